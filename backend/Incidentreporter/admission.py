@@ -0,0 +1,110 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by client.
+
+    Each client gets a bucket of `burst` tokens refilled at `rate` tokens per
+    second. Buckets live in an LRU table capped at max_clients, so memory
+    stays bounded however many distinct clients show up; an evicted client
+    simply starts again with a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 100000):
+        """
+        Args:
+            rate (float): Tokens added per second
+            burst (float): Bucket size
+            max_clients (int): Maximum number of buckets kept
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    def allow(self, key, cost: float = 1.0, now: float = None) -> tuple:
+        """
+        Take cost tokens from a client's bucket.
+
+        Returns:
+            tuple: (allowed, retry_after) where retry_after is the number of
+                seconds until the request would be allowed
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._buckets.get(key)
+            if entry is None:
+                tokens = self.burst
+            else:
+                tokens = min(self.burst, entry[0] + (now - entry[1]) * self.rate)
+                self._buckets.move_to_end(key)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                self.allowed += 1
+                allowed = True
+                retry_after = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                self.limited += 1
+                allowed = False
+                retry_after = (cost - tokens) / self.rate if self.rate > 0 else math.inf
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+    def stats(self) -> dict:
+        """Return limiter settings and counters."""
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'clients': len(self._buckets),
+                'allowed': self.allowed,
+                'limited': self.limited
+            }
+
+
+class ConcurrencyLimiter:
+    """Non-blocking cap on the number of concurrent operations."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free. Returns False when the cap is reached."""
+        with self._lock:
+            if self.in_flight >= self.limit:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            self.admitted += 1
+            self.peak = max(self.peak, self.in_flight)
+            return True
+
+    def release(self) -> None:
+        """Give back a slot taken with try_acquire()."""
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        """Return the cap, current and peak usage, and counters."""
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'peak': self.peak,
+                'admitted': self.admitted,
+                'rejected': self.rejected
+            }
@@ -1,18 +1,439 @@
 import os
-import logging
+import json
+import math
+import time
+import atexit
 import requests
-from flask import Flask, render_template, request, jsonify
-from llm_reporter import IncidentReporter
+from collections import Counter
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
+from sqlalchemy.exc import InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+from llm_reporter import IncidentReporter, VALID_TYPES
+from geocode_cache import GeocodeCache, PrewarmIndex, create_http_session
+from upstreams import AsyncUpstreams, UpstreamError
+from models import db, Incident, parse_utc
+from incident_store import IncidentStore, coordinates_of, parse_timestamp, report_timestamp
+from incident_clusterer import IncidentClusterer, last_seen_timestamp
+from keyword_classifier import classify_message
+from road_index import RoadSegmentIndex
+from offline_geocoder import OfflineGeocoder
+from incident_feed import IncidentFeed, format_event
+from ingest_log import IngestLog
+from incident_expiry import ExpiryPolicy, IncidentExpiry
+from heatmap_tiles import HeatmapTiles
+from responses import FastJSONProvider, slim_report, wants_echo
+from route_corridor import RouteCorridor, RouteTooLong, decode_polyline
+from admission import ConcurrencyLimiter, RateLimiter
+from logging_config import configure_logging
+from metrics import fallbacks, registry, request_seconds, stage_seconds, startup_seconds, upstream_errors
+from backends import BackendRegistry, StartupTimer
 
-# Configure logging for debugging
-logging.basicConfig(level=logging.DEBUG)
+# Startup phases are timed here and reported once the module has loaded
+startup_timer = StartupTimer()
+
+# Level-gated logging; LOG_FORMAT=json writes one JSON object per line
+configure_logging(os.environ.get('LOG_LEVEL', 'INFO'), os.environ.get('LOG_FORMAT', 'text'))
 
 # Create the Flask app
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///incidents.db')
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_pre_ping': True}
+db.init_app(app)
+
+# Upstream clients are built on first use in each process, or warmed in the
+# background after fork (see gunicorn.conf.py). Workers boot without the
+# OpenAI SDK, and a missing OPENAI_API_KEY only turns off the AI path.
+backends = BackendRegistry()
+
+# In async serving mode, upstream calls share one event loop per process
+SERVING_MODE = os.environ.get('SERVING_MODE', 'sync')
+
+# Limits below are enforced in each process's memory. Those that protect
+# upstream quota (rate limits, AI and upstream concurrency) are configured
+# for the whole server and split evenly across the WEB_CONCURRENCY workers;
+# shedding and stream caps protect a worker's own threads and stay per worker
+WORKER_COUNT = max(int(os.environ.get('WEB_CONCURRENCY', 1)), 1)
+
+def per_worker(limit, minimum=1):
+    """Return this worker's share of a server-wide limit."""
+    return max(limit / WORKER_COUNT, minimum)
+
+def create_upstreams():
+    return AsyncUpstreams(
+        limits={
+            'geocode': int(per_worker(int(os.environ.get('GEOCODE_CONCURRENCY', 50)))),
+            'openai': int(per_worker(int(os.environ.get('LLM_CONCURRENCY', 20))))
+        },
+        timeouts={
+            'geocode': float(os.environ.get('GEOCODE_TIMEOUT', 5)),
+            'openai': float(os.environ.get('LLM_TIMEOUT', 15))
+        },
+        pool_size=int(os.environ.get('HTTP_POOL_SIZE', 100))
+    )
+
+def async_upstreams():
+    """Return this process's shared event loop client in async mode, else None."""
+    return backends.get('upstreams') if SERVING_MODE == 'async' else None
+
+if SERVING_MODE == 'async':
+    backends.register('upstreams', create_upstreams)
+backends.register('llm', lambda: IncidentReporter(upstreams=async_upstreams()),
+                  retry_seconds=float(os.environ.get('BACKEND_RETRY_SECONDS', 30)))
+backends.register('http', lambda: create_http_session(pool_size=int(os.environ.get('HTTP_POOL_SIZE', 20))))
+
+# Latency budget for AI classification on /report before falling back to keywords
+LLM_DEADLINE_SECONDS = float(os.environ.get('LLM_DEADLINE_MS', 800)) / 1000
+LLM_LATE_UPGRADE = os.environ.get('LLM_LATE_UPGRADE', '1') == '1'
+ai_deadline_stats = Counter()
+
+# Messages the keyword classifier scores at or above this confidence skip the LLM
+LOCAL_CONFIDENCE_THRESHOLD = float(os.environ.get('LOCAL_CONFIDENCE_THRESHOLD', 0.8))
+routing_stats = Counter()
+confidence_histogram = [0] * 10
+
+def record_routing(confidence, route):
+    """Count a routing decision and its keyword confidence for threshold tuning."""
+    routing_stats[route] += 1
+    confidence_histogram[min(int(confidence * 10), 9)] += 1
+
+# Per-client token buckets for the routes that spend OpenAI or Google quota,
+# as [tokens per second, burst] by endpoint; RATE_LIMITS overrides them with
+# a JSON object in the same shape, e.g. {"report_incident": [2, 20]}. With
+# several workers each gets an even share, so a client's limit is only
+# approximate unless its requests are spread evenly across workers
+RATE_LIMITS = {
+    'report_incident': [1, 10],
+    'report_batch': [0.2, 2],
+    'geocode_location': [5, 20],
+    'geocode_bulk': [1, 5],
+    'position_update': [2, 10],
+    'quick_report_submit': [1, 10],
+    'smart_report': [1, 10],
+    'nearby_incidents': [5, 20],
+    'incidents_along_route': [1, 10]
+}
+RATE_LIMITS.update(json.loads(os.environ.get('RATE_LIMITS') or '{}'))
+for endpoint, (rate, burst) in RATE_LIMITS.items():
+    # A zero rate never refills, so there is no Retry-After to give
+    if not (rate > 0 and burst >= 1):
+        raise ValueError(f"RATE_LIMITS[{endpoint!r}] needs a rate above 0 and a burst of at least 1")
+rate_limiters = {
+    endpoint: RateLimiter(per_worker(rate, 0), per_worker(burst),
+                          max_clients=int(os.environ.get('RATE_LIMIT_MAX_CLIENTS', 100000)))
+    for endpoint, (rate, burst) in RATE_LIMITS.items()
+}
+TRUST_PROXY_HEADERS = os.environ.get('TRUST_PROXY_HEADERS', 'false').lower() == 'true'
+
+# Requests in progress on those routes in this worker beyond this are shed with a 503
+SHED_MAX_IN_FLIGHT = int(os.environ.get('SHED_MAX_IN_FLIGHT', 64))
+in_flight = ConcurrencyLimiter(SHED_MAX_IN_FLIGHT)
+
+# AI classifications in progress beyond this are served by the keyword classifier
+ai_slots = ConcurrencyLimiter(int(per_worker(int(os.environ.get('AI_MAX_CONCURRENCY', 32)))))
+
+# Each open /incidents/stream holds a worker thread for its whole life, so
+# streams are capped below WORKER_THREADS to leave threads for other requests
+stream_slots = ConcurrencyLimiter(int(os.environ.get('STREAM_MAX_CLIENTS', 16)))
+
+def client_key():
+    """Identify the client for rate limiting by its address."""
+    if TRUST_PROXY_HEADERS and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr or 'unknown'
+
+@app.before_request
+def start_request_timer():
+    g.started = time.perf_counter()
+
+@app.before_request
+def admit_request():
+    """Rate-limit and shed load on the expensive routes before any work is done."""
+    limiter = rate_limiters.get(request.endpoint)
+    if limiter is None:
+        return None
+    
+    allowed, retry_after = limiter.allow(client_key())
+    if not allowed:
+        response = jsonify({
+            'error': 'Rate limit exceeded, please slow down',
+            'success': False
+        })
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+    
+    if not in_flight.try_acquire():
+        response = jsonify({
+            'error': 'Service is overloaded, please retry shortly',
+            'success': False
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+    g.in_flight = True
+    return None
+
+@app.before_request
+def parse_request_body():
+    """Parse JSON bodies up front so parsing is timed once; handlers reuse the cached result."""
+    if request.is_json:
+        with stage_seconds.time(stage='parse'):
+            request.get_json(silent=True)
+
+@app.after_request
+def observe_request(response):
+    started = g.get('started')
+    if started is not None:
+        request_seconds.observe(time.perf_counter() - started,
+                                endpoint=request.endpoint or 'unmatched', status=response.status_code)
+    return response
+
+@app.teardown_request
+def release_request(error=None):
+    if g.pop('in_flight', False):
+        in_flight.release()
+
+# Reverse-geocode cache and pooled HTTP session for Google Maps calls
+GEOCODE_URL = os.environ.get("GOOGLE_GEOCODE_URL", "https://maps.googleapis.com/maps/api/geocode/json")
+geocode_cache = GeocodeCache(
+    precision=int(os.environ.get('GEOCODE_CACHE_PRECISION', 4)),
+    max_entries=int(os.environ.get('GEOCODE_CACHE_SIZE', 10000)),
+    ttl_seconds=float(os.environ.get('GEOCODE_CACHE_TTL', 86400))
+)
+# Results pre-warmed from /position, reused by /quick-report taps within this distance
+prewarm_index = PrewarmIndex(
+    max_distance_m=float(os.environ.get('GEOCODE_PREWARM_DISTANCE_M', 150)),
+    max_cells=int(os.environ.get('GEOCODE_CACHE_SIZE', 10000))
+)
+
+# Offline road-segment index, used instead of name-based road classification
+road_index = None
+if os.environ.get('ROAD_INDEX_PATH'):
+    try:
+        with startup_timer.phase('road_index'):
+            road_index = RoadSegmentIndex.load(os.environ['ROAD_INDEX_PATH'])
+        app.logger.info("Loaded road index with %d segments", len(road_index))
+    except Exception as e:
+        app.logger.error("Failed to load road index: %s", e)
+ROAD_INDEX_MAX_DISTANCE_M = float(os.environ.get('ROAD_INDEX_MAX_DISTANCE_M', 50))
+
+# Local reverse geocoder, used as the primary or fallback backend behind /geocode
+offline_geocoder = None
+if os.environ.get('OFFLINE_GEOCODER_PATH'):
+    try:
+        with startup_timer.phase('offline_geocoder'):
+            offline_geocoder = OfflineGeocoder.load(os.environ['OFFLINE_GEOCODER_PATH'])
+        app.logger.info("Loaded offline geocoder with %d address points", len(offline_geocoder))
+    except Exception as e:
+        app.logger.error("Failed to load offline geocoder: %s", e)
+OFFLINE_GEOCODER_MAX_DISTANCE_M = float(os.environ.get('OFFLINE_GEOCODER_MAX_DISTANCE_M', 200))
+
+# Live incidents, spatially indexed for nearby queries
+incident_store = IncidentStore(cell_size_deg=float(os.environ.get('INCIDENT_INDEX_CELL_DEG', 0.01)))
+
+# Duplicate sightings of the same incident are merged into one report
+incident_clusterer = IncidentClusterer(
+    incident_store,
+    radius_m=float(os.environ.get('CLUSTER_RADIUS_M', 150)),
+    window_seconds=float(os.environ.get('CLUSTER_WINDOW_SECONDS', 900))
+)
+
+# Push feed of new and updated incidents for area subscribers
+incident_feed = IncidentFeed(
+    cell_size_deg=float(os.environ.get('FEED_CELL_DEG', 0.05)),
+    queue_size=int(os.environ.get('FEED_QUEUE_SIZE', 100)),
+    max_drops=int(os.environ.get('FEED_MAX_DROPS', 500))
+)
+
+# Incidents are retired once their type- and severity-based lifetime runs
+# out without a new confirmation; INCIDENT_TTL_SECONDS is a JSON object of
+# per-type overrides, e.g. {"speed_trap": 900}
+incident_expiry = IncidentExpiry(ExpiryPolicy(
+    type_ttls=json.loads(os.environ.get('INCIDENT_TTL_SECONDS') or '{}'),
+    default_ttl=float(os.environ.get('INCIDENT_DEFAULT_TTL_SECONDS', 7200))
+))
+
+# Rolling per-tile density grids for map overlays
+heatmap_tiles = HeatmapTiles(
+    VALID_TYPES,
+    min_zoom=int(os.environ.get('HEATMAP_MIN_ZOOM', 6)),
+    max_zoom=int(os.environ.get('HEATMAP_MAX_ZOOM', 14)),
+    resolution=int(os.environ.get('HEATMAP_RESOLUTION', 16)),
+    bucket_seconds=float(os.environ.get('HEATMAP_BUCKET_SECONDS', 300)),
+    buckets=int(os.environ.get('HEATMAP_BUCKETS', 12)),
+    max_cells=int(os.environ.get('HEATMAP_MAX_CELLS', 500000))
+)
+
+def schedule_expiry(incident):
+    """Set an incident's deadline from its last confirmation and store its expires_at."""
+    incident_expiry.schedule(incident, last_seen_timestamp(incident))
+    incident_store.update(incident['id'], {'expires_at': incident['expires_at']})
 
-# Initialize the incident reporter
-incident_reporter = IncidentReporter()
+def expire_incidents():
+    """Retire every live incident whose lifetime has run out."""
+    with incident_clusterer.locked():
+        for incident_id in incident_expiry.pop_expired(time.time()):
+            incident = incident_clusterer.retire(incident_id)
+            if incident is not None:
+                incident_feed.publish(incident, 'expired')
+
+def load_recent_incidents():
+    """
+    Reload incidents that are still live from the database into the live store.
+    
+    Rows are selected by expires_at, so long-lived and re-confirmed incidents
+    come back however long ago they were first reported. Rows written before
+    expires_at was stored fall back to INCIDENT_RELOAD_HOURS.
+    """
+    hours = float(os.environ.get('INCIDENT_RELOAD_HOURS', 24))
+    now_utc = datetime.utcnow()
+    rows = Incident.query.filter(db.or_(
+        Incident.expires_at > now_utc,
+        db.and_(Incident.expires_at.is_(None), Incident.reported_at >= now_utc - timedelta(hours=hours))
+    )).all()
+    now = time.time()
+    loaded = 0
+    for report in sorted((row.report for row in rows), key=last_seen_timestamp):
+        seen_at = last_seen_timestamp(report)
+        if seen_at + incident_expiry.policy.ttl_for(report) <= now:
+            continue
+        schedule_expiry(incident_clusterer.restore(report))
+        loaded += 1
+    app.logger.info("Loaded %d live incidents", loaded)
+
+def add_missing_columns():
+    """Add columns introduced after an existing incidents table was created, filling them from the reports."""
+    columns = {column['name'] for column in db.inspect(db.engine).get_columns(Incident.__tablename__)}
+    if 'expires_at' not in columns:
+        with db.engine.begin() as connection:
+            connection.execute(db.text('ALTER TABLE incidents ADD COLUMN expires_at TIMESTAMP'))
+            connection.execute(db.text('CREATE INDEX IF NOT EXISTS ix_incidents_expires_at ON incidents (expires_at)'))
+        incidents = Incident.__table__
+        rows = db.session.execute(db.select(incidents.c.id, incidents.c.report)).all()
+        updates = [{'row_id': row.id, 'expires_at': parse_utc((row.report or {}).get('expires_at'))} for row in rows]
+        updates = [update for update in updates if update['expires_at'] is not None]
+        if updates:
+            db.session.execute(incidents.update().where(incidents.c.id == db.bindparam('row_id'))
+                               .values(expires_at=db.bindparam('expires_at')), updates)
+        db.session.commit()
+        app.logger.info("Added incidents.expires_at for %d existing row(s)", len(updates))
+
+def write_incident_rows(records):
+    """Bulk-write logged incident records, replacing any existing rows."""
+    rows = [Incident.row_values(record['report'], record['reported_at']) for record in records]
+    with app.app_context():
+        try:
+            incidents = Incident.__table__
+            db.session.execute(incidents.delete().where(incidents.c.id.in_([row['id'] for row in rows])))
+            db.session.execute(incidents.insert(), rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error("Failed to write %d incident(s): %s", len(rows), e)
+            raise
+
+# Accepted reports are made durable in a local log and written to the
+# database in bulk by a background thread
+ingest_log = IngestLog(
+    os.environ.get('INGEST_LOG_DIR', 'ingest_log'),
+    write_incident_rows,
+    flush_interval=float(os.environ.get('INGEST_FLUSH_INTERVAL_MS', 200)) / 1000,
+    max_batch=int(os.environ.get('INGEST_FLUSH_MAX_BATCH', 1000)),
+    fsync=os.environ.get('INGEST_LOG_FSYNC', 'true').lower() == 'true',
+    # Only an unreachable database keeps records queued; a record the
+    # database rejects is set aside instead of blocking the log
+    transient_errors=(OSError, OperationalError, InterfaceError, PoolTimeoutError)
+)
+atexit.register(ingest_log.close)
+
+with app.app_context():
+    with startup_timer.phase('create_tables'):
+        db.create_all()
+        add_missing_columns()
+    with startup_timer.phase('ingest_replay'):
+        replayed = ingest_log.replay()
+    if replayed:
+        app.logger.info("Replayed %d logged incident writes", replayed)
+    with startup_timer.phase('load_incidents'):
+        load_recent_incidents()
+
+def dispose_db_pool():
+    """Drop database connections inherited from the parent after a fork."""
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+os.register_at_fork(after_in_child=dispose_db_pool)
+
+def record_incident(report):
+    """
+    Add a report to the live store and persist it.
+    
+    Returns (incident, merged). When the report repeats a recent sighting,
+    incident is the existing report with its confirmation count raised.
+    """
+    return record_incidents([report])[0]
+
+def record_incidents(reports):
+    """Add several reports to the live store and log them for persistence."""
+    expire_incidents()
+    # Expiry, the log and the feed must see merges in the order they
+    # happened, so all of it runs under the clusterer lock; only the wait
+    # for the disk happens after it is released
+    with incident_clusterer.locked():
+        results = [incident_clusterer.ingest(report) for report in reports]
+        for incident, _ in results:
+            schedule_expiry(incident)
+        logged = log_incidents([incident for incident, _ in results])
+        for incident, merged in results:
+            incident_feed.publish(incident, 'updated' if merged else 'created')
+    ingest_log.wait(logged)
+    now = time.time()
+    for report, (incident, _) in zip(reports, results):
+        position = coordinates_of(report)
+        if position is not None:
+            heatmap_tiles.add(*position, incident.get('incident_type') or 'other', report_timestamp(report), now)
+    return results
+
+def log_incidents(incidents):
+    """
+    Write the current state of incidents to the ingest log without waiting
+    for the disk. Returns the position to pass to ingest_log.wait().
+    """
+    return ingest_log.write_many([{
+        'id': incident['id'],
+        'reported_at': incident_store.timestamp(incident['id']),
+        'report': incident
+    } for incident in incidents])
+
+# Fields taken from a late AI answer when upgrading a keyword-based report
+AI_UPGRADE_FIELDS = ['incident_type', 'location', 'severity', 'description', 'direction',
+                     'lanes_affected', 'estimated_delay', 'time_mentioned']
+
+def upgrade_incident(incident_id, ai_future):
+    """Replace a keyword-based report with the AI classification once it arrives."""
+    try:
+        ai_report = ai_future.result()
+    except Exception as e:
+        app.logger.warning("Late AI classification failed: %s", e, extra={'incident_id': incident_id})
+        return
+    
+    # processed_at is left alone: it is the expiry base and should stay the
+    # time the report was accepted, not the time the AI answered
+    fields = {field: ai_report.get(field) for field in AI_UPGRADE_FIELDS if field in ai_report}
+    fields['processing_method'] = 'ai_late_upgrade'
+    with incident_clusterer.locked():
+        # The keyword score does not describe the AI classification
+        incident = incident_clusterer.update(incident_id, fields, remove=('confidence',))
+        if incident is None:
+            return
+        schedule_expiry(incident)
+        logged = log_incidents([incident])
+        incident_feed.publish(incident, 'updated')
+    ai_deadline_stats['late_upgrades'] += 1
+    ingest_log.wait(logged)
 
 @app.route('/')
 def index():
@@ -27,72 +448,334 @@ def quick_report():
 
 @app.route('/geocode', methods=['POST'])
 def geocode_location():
-    """Convert coordinates to human-readable address using Google Maps API."""
+    """Convert coordinates to human-readable address using Google Maps or the offline geocoder."""
     try:
         data = request.get_json()
         lat = data.get('lat')
         lng = data.get('lng')
         
-        if not lat or not lng:
+        if lat in (None, '') or lng in (None, ''):
             return jsonify({
                 'error': 'Latitude and longitude are required',
                 'success': False
             }), 400
         
-        # Use Google Maps Geocoding API
-        google_maps_key = os.environ.get('GOOGLE_MAPS_API_KEY')
-        if not google_maps_key:
+        try:
+            coordinates = normalize_coordinates({'lat': lat, 'lng': lng})
+        except ValueError as e:
             return jsonify({
-                'error': 'Google Maps API key not configured',
+                'error': f'Invalid input: {str(e)}',
                 'success': False
-            }), 500
-        
-        # Reverse geocoding to get address
-        geocode_url = f"https://maps.googleapis.com/maps/api/geocode/json"
-        params = {
-            'latlng': f"{lat},{lng}",
-            'key': google_maps_key,
-            'result_type': 'street_address|route|intersection'
-        }
+            }), 400
+        lat, lng = coordinates['lat'], coordinates['lng']
         
-        response = requests.get(geocode_url, params=params)
-        response.raise_for_status()
+        # Use the configured geocoding backends in order
+        if not geocoding_backends():
+            return jsonify({
+                'error': 'No geocoding backend configured',
+                'success': False
+            }), 500
         
-        geocode_data = response.json()
+        # Reverse geocoding to get address (served from cache when possible)
+        location = reverse_geocode(lat, lng)
         
-        if geocode_data['status'] != 'OK' or not geocode_data['results']:
+        if location is None:
             return jsonify({
                 'error': 'Could not determine location from coordinates',
                 'success': False
             }), 400
         
-        result = geocode_data['results'][0]
-        address = result['formatted_address']
-        
-        # Extract road information for AI analysis
-        road_info = extract_road_info(result)
+        address, road_info, source = location
         
         return jsonify({
             'success': True,
             'address': address,
             'road_info': road_info,
-            'coordinates': {'lat': lat, 'lng': lng}
+            'coordinates': {'lat': lat, 'lng': lng},
+            'source': source
         })
         
-    except requests.RequestException as e:
-        app.logger.error(f"Google Maps API error: {str(e)}")
+    except (requests.RequestException, UpstreamError) as e:
+        app.logger.error("Google Maps API error: %s", e)
         return jsonify({
             'error': 'Failed to get location information',
             'success': False
         }), 500
         
     except Exception as e:
-        app.logger.error(f"Geocoding error: {str(e)}")
+        app.logger.error("Geocoding error: %s", e)
         return jsonify({
             'error': 'Failed to process location',
             'success': False
         }), 500
 
+@app.route('/geocode/bulk', methods=['POST'])
+def geocode_bulk():
+    """
+    Reverse-geocode many points in one call with the offline geocoder.
+    Accepts {"points": [{"lat": ..., "lng": ...}, ...]} and returns results
+    in input order, with null for points that have no nearby address.
+    """
+    if offline_geocoder is None:
+        return jsonify({
+            'error': 'Offline geocoder not configured',
+            'success': False
+        }), 503
+    
+    data = request.get_json(silent=True) or {}
+    points = data.get('points')
+    if not isinstance(points, list):
+        return jsonify({
+            'error': 'A points array is required',
+            'success': False
+        }), 400
+    
+    max_points = int(os.environ.get('GEOCODE_BULK_MAX', 10000))
+    if len(points) > max_points:
+        return jsonify({
+            'error': f'Request exceeds the limit of {max_points} points',
+            'success': False
+        }), 413
+    
+    results = []
+    for point in points:
+        # Unparseable or out-of-range points have no address
+        position = coordinates_of({'coordinates': point}) if isinstance(point, dict) else None
+        if position is None:
+            results.append(None)
+            continue
+        lat, lng = position
+        location = offline_reverse_geocode(lat, lng)
+        if location is None:
+            results.append(None)
+            continue
+        results.append({
+            'address': location[0],
+            'road_info': location[1],
+            'coordinates': {'lat': lat, 'lng': lng}
+        })
+    
+    return jsonify({
+        'success': True,
+        'count': len(results),
+        'results': results
+    })
+
+def geocoding_backends():
+    """Return the available geocoding backends, primary first."""
+    available = []
+    if os.environ.get('GOOGLE_MAPS_API_KEY'):
+        available.append('google')
+    if offline_geocoder is not None:
+        available.append('offline')
+    if os.environ.get('GEOCODER_BACKEND', 'google') == 'offline':
+        available.reverse()
+    if os.environ.get('GEOCODER_FALLBACK', '1') != '1':
+        available = available[:1]
+    return available
+
+def reverse_geocode(lat, lng, nearby=False):
+    """
+    Resolve coordinates to (address, road_info, source) using the configured
+    backends in order, moving on when one has no result or fails. With
+    nearby, a Google result pre-warmed for a position close by is accepted.
+    
+    Returns None when no backend finds the location. Re-raises the last
+    upstream error when every backend that was tried failed.
+    """
+    last_error = None
+    for backend in geocoding_backends():
+        try:
+            if backend == 'google':
+                result = fetch_geocode_result(lat, lng, os.environ.get('GOOGLE_MAPS_API_KEY'), nearby)
+                if result is not None:
+                    road_info = extract_road_info(result, {'lat': lat, 'lng': lng})
+                    return result['formatted_address'], road_info, 'google'
+            else:
+                location = offline_reverse_geocode(float(lat), float(lng))
+                if location is not None:
+                    return location[0], location[1], 'offline'
+            last_error = None
+        except (requests.RequestException, UpstreamError) as e:
+            app.logger.warning("Geocoding backend failed: %s", e, extra={'backend': backend})
+            last_error = e
+    if last_error is not None:
+        raise last_error
+    return None
+
+def offline_reverse_geocode(lat, lng):
+    """Resolve coordinates with the offline geocoder to (address, road_info), or None."""
+    hit = offline_geocoder.reverse(lat, lng, OFFLINE_GEOCODER_MAX_DISTANCE_M)
+    if hit is None:
+        return None
+    components = [{'types': ['route'], 'long_name': hit['street']}] if hit['street'] else []
+    road_info = extract_road_info({'address_components': components}, {'lat': lat, 'lng': lng})
+    return hit['address'], road_info
+
+def fetch_geocode_result(lat, lng, google_maps_key, nearby=False):
+    """
+    Return the first Google reverse-geocoding result for the coordinates.
+    
+    Results are cached per quantized grid cell, so nearby lookups skip the
+    upstream call. With nearby, the result pre-warmed for the closest
+    reported position within GEOCODE_PREWARM_DISTANCE_M is used next.
+    Returns None when Google has no result for the location.
+    """
+    cached = geocode_cache.get(lat, lng)
+    if cached is not None:
+        return cached
+    if nearby:
+        cached = prewarm_index.nearest(lat, lng)
+        if cached is not None:
+            return cached
+    
+    params = {
+        'latlng': f"{lat},{lng}",
+        'key': google_maps_key,
+        'result_type': 'street_address|route|intersection'
+    }
+    
+    upstreams = async_upstreams()
+    try:
+        with stage_seconds.time(stage='geocode_upstream'):
+            if upstreams is not None:
+                geocode_data = upstreams.get_json('geocode', GEOCODE_URL, params)
+            else:
+                response = backends.get('http').get(GEOCODE_URL, params=params,
+                                                    timeout=float(os.environ.get('GEOCODE_TIMEOUT', 5)))
+                response.raise_for_status()
+                geocode_data = response.json()
+    except Exception:
+        upstream_errors.inc(upstream='geocode')
+        raise
+    
+    if geocode_data['status'] != 'OK' or not geocode_data['results']:
+        return None
+    
+    result = geocode_data['results'][0]
+    geocode_cache.put(lat, lng, result)
+    return result
+
+# Background pool that pre-warms the geocode cache from position updates
+prewarm_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('GEOCODE_PREWARM_WORKERS', 4)),
+                                      thread_name_prefix='geocode-prewarm')
+prewarm_pending = set()
+
+@app.route('/position', methods=['POST'])
+def position_update():
+    """
+    Accept a driver's position and pre-warm the geocode cache for it in the
+    background, so a later /quick-report within GEOCODE_PREWARM_DISTANCE_M
+    skips the upstream lookup.
+    """
+    data = request.get_json(silent=True) or {}
+    lat = data.get('lat')
+    lng = data.get('lng')
+    
+    if lat in (None, '') or lng in (None, ''):
+        return jsonify({
+            'error': 'Latitude and longitude are required',
+            'success': False
+        }), 400
+    
+    try:
+        coordinates = normalize_coordinates({'lat': lat, 'lng': lng})
+    except ValueError as e:
+        return jsonify({
+            'error': f'Invalid input: {str(e)}',
+            'success': False
+        }), 400
+    lat, lng = coordinates['lat'], coordinates['lng']
+    
+    google_maps_key = os.environ.get('GOOGLE_MAPS_API_KEY')
+    if not google_maps_key:
+        return jsonify({'success': True, 'prewarming': False}), 202
+    
+    key = geocode_cache.key_for(lat, lng)
+    if geocode_cache.contains(lat, lng) or key in prewarm_pending:
+        return jsonify({'success': True, 'prewarming': False}), 202
+    
+    prewarm_pending.add(key)
+    
+    def prewarm():
+        try:
+            result = fetch_geocode_result(lat, lng, google_maps_key)
+            if result is not None:
+                prewarm_index.put(lat, lng, result)
+        except Exception as e:
+            app.logger.warning("Geocode pre-warm failed: %s", e)
+        finally:
+            prewarm_pending.discard(key)
+    
+    prewarm_executor.submit(prewarm)
+    return jsonify({'success': True, 'prewarming': True}), 202
+
+@app.route('/quick-report', methods=['POST'])
+def quick_report_submit():
+    """
+    Create a location-based incident report in a single round trip.
+    Accepts incident_type plus raw lat/lng; reverse geocoding, road analysis
+    and report creation all happen server-side.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        incident_type = data.get('incident_type')
+        coordinates = data.get('coordinates') or {}
+        lat = data.get('lat', coordinates.get('lat'))
+        lng = data.get('lng', coordinates.get('lng'))
+        
+        if not incident_type:
+            return jsonify({
+                'error': 'Incident type is required',
+                'success': False
+            }), 400
+        
+        if lat in (None, '') or lng in (None, ''):
+            return jsonify({
+                'error': 'Latitude and longitude are required',
+                'success': False
+            }), 400
+        
+        try:
+            coordinates = normalize_coordinates({'lat': lat, 'lng': lng})
+        except ValueError as e:
+            return jsonify({
+                'error': f'Invalid input: {str(e)}',
+                'success': False
+            }), 400
+        lat, lng = coordinates['lat'], coordinates['lng']
+        
+        # Geocoding failures degrade the report rather than losing it
+        address = None
+        road_info = extract_road_info({}, coordinates) if road_index is not None else {}
+        try:
+            location = reverse_geocode(lat, lng, nearby=True)
+            if location is not None:
+                address, road_info, _ = location
+        except (requests.RequestException, UpstreamError) as e:
+            app.logger.warning("Geocoding failed during quick report: %s", e)
+        
+        report = create_smart_fallback_report(incident_type, coordinates, road_info, address)
+        incident, merged = record_incident(report)
+        app.logger.debug("Recorded quick report", extra={'incident_type': incident_type, 'merged': merged,
+                                                          'address': address})
+        
+        return jsonify({
+            'success': True,
+            'incident_report': incident,
+            'merged': merged,
+            'address': address,
+            'road_info': road_info
+        })
+        
+    except Exception as e:
+        app.logger.error("Quick report error: %s", e)
+        return jsonify({
+            'error': 'Failed to create quick report',
+            'success': False
+        }), 500
+
 @app.route('/smart-report', methods=['POST'])
 def smart_report():
     """Create an AI-enhanced incident report with automatic location and lane analysis."""
@@ -100,7 +783,6 @@ def smart_report():
         data = request.get_json()
         
         incident_type = data.get('incident_type')
-        coordinates = data.get('coordinates', {})
         road_info = data.get('road_info', {})
         
         if not incident_type:
@@ -109,27 +791,56 @@ def smart_report():
                 'success': False
             }), 400
         
+        try:
+            coordinates = normalize_coordinates(data.get('coordinates')) or {}
+        except ValueError as e:
+            return jsonify({
+                'error': f'Invalid input: {str(e)}',
+                'success': False
+            }), 400
+        
         # Get address from geocode data if available
         address = data.get('address')
         
         # Always use smart fallback for reliability (AI quota issues)
         enhanced_report = create_smart_fallback_report(incident_type, coordinates, road_info, address)
-        app.logger.info(f"Created smart report for {incident_type} at {address or 'current location'}")
+        incident, merged = record_incident(enhanced_report)
+        app.logger.debug("Recorded smart report", extra={'incident_type': incident_type, 'merged': merged,
+                                                          'address': address})
         
         return jsonify({
             'success': True,
-            'incident_report': enhanced_report
+            'incident_report': incident,
+            'merged': merged
         })
         
     except Exception as e:
-        app.logger.error(f"Smart report error: {str(e)}")
+        app.logger.error("Smart report error: %s", e)
         return jsonify({
             'error': 'Failed to create smart report',
             'success': False
         }), 500
 
-def extract_road_info(geocode_result):
-    """Extract useful road information from Google Maps geocoding result."""
+def extract_road_info(geocode_result, coordinates=None):
+    """
+    Extract useful road information for a location.
+    
+    When the offline road index is loaded and coordinates are given, the
+    nearest mapped road segment supplies the real highway class, lanes,
+    speed limit and bearing. Otherwise road type is guessed from the street
+    name in the Google Maps geocoding result.
+    """
+    if road_index is not None and coordinates:
+        try:
+            indexed = road_index.road_info(float(coordinates['lat']), float(coordinates['lng']),
+                                           ROAD_INDEX_MAX_DISTANCE_M)
+        except (KeyError, TypeError, ValueError):
+            indexed = None
+        if indexed is not None:
+            indexed['is_intersection'] = any('intersection' in component.get('types', [])
+                                             for component in geocode_result.get('address_components', []))
+            return indexed
+    
     road_info = {
         'road_type': 'unknown',
         'speed_limit_estimate': None,
@@ -167,8 +878,6 @@ def extract_road_info(geocode_result):
 
 def create_smart_fallback_report(incident_type, coordinates, road_info, address=None):
     """Create simple incident report for location reporting."""
-    from datetime import datetime
-    
     # Use actual address from Google Maps if available
     location = address or "Current location"
     
@@ -201,6 +910,8 @@ def report_incident():
                 'success': False
             }), 400
         
+        ai_pending = False
+        
         # Check if this is structured data (from form dropdowns) or natural language
         if 'incident_type' in data and 'location' in data:
             # Structured data from form
@@ -214,39 +925,203 @@ def report_incident():
                     'error': 'Message field is required and cannot be empty',
                     'success': False
                 }), 400
+            coordinates = normalize_coordinates(data.get('coordinates'))
             
-            # Try AI processing, fallback to basic parsing if API unavailable
-            try:
-                app.logger.info(f"Processing incident report with AI: {message}")
-                result = incident_reporter.generate_report(message)
-            except Exception as ai_error:
-                app.logger.warning(f"AI processing failed, using basic parsing: {str(ai_error)}")
-                result = create_basic_report(message)
+            # Serve confident keyword classifications locally; only ambiguous
+            # messages go to the AI service
+            local_report = create_basic_report(message)
+            
+            if local_report['confidence'] >= LOCAL_CONFIDENCE_THRESHOLD:
+                record_routing(local_report['confidence'], 'local')
+                result = local_report
+            else:
+                # Try AI processing within the latency budget, fallback to basic
+                # parsing if the API is unavailable, too slow or saturated. A
+                # reporter that is not built yet counts as unavailable; building
+                # it takes longer than the deadline, so it happens in the background
+                incident_reporter = backends.peek_or_warm('llm')
+                if incident_reporter is None:
+                    record_routing(local_report['confidence'], 'degraded')
+                    fallbacks.inc(reason='unavailable')
+                    result = local_report
+                elif not ai_slots.try_acquire():
+                    record_routing(local_report['confidence'], 'degraded')
+                    fallbacks.inc(reason='saturated')
+                    result = local_report
+                else:
+                    record_routing(local_report['confidence'], 'ai')
+                    try:
+                        app.logger.debug("Processing incident report with AI", extra={'chars': len(message)})
+                        try:
+                            ai_future = incident_reporter.submit_report(message)
+                        except Exception:
+                            ai_slots.release()
+                            raise
+                        # The slot is held until the AI call finishes, even past the deadline
+                        ai_future.add_done_callback(lambda done: ai_slots.release())
+                        result = ai_future.result(timeout=LLM_DEADLINE_SECONDS)
+                        ai_deadline_stats['on_time'] += 1
+                    except FutureTimeoutError:
+                        app.logger.warning("AI processing exceeded %g ms, using basic parsing", LLM_DEADLINE_SECONDS * 1000)
+                        ai_deadline_stats['deadline_fallbacks'] += 1
+                        fallbacks.inc(reason='deadline')
+                        result = local_report
+                        ai_pending = LLM_LATE_UPGRADE
+                    except Exception as ai_error:
+                        app.logger.warning("AI processing failed, using basic parsing: %s", ai_error)
+                        ai_deadline_stats['error_fallbacks'] += 1
+                        fallbacks.inc(reason='error')
+                        result = local_report
+            
+            if coordinates:
+                result['coordinates'] = coordinates
         
-        return jsonify({
+        result, merged = record_incident(result)
+        
+        # Upgrade the stored report when the late AI answer arrives, unless it
+        # was folded into an incident other drivers already confirmed
+        ai_pending = ai_pending and not merged
+        if ai_pending:
+            incident_id = result['id']
+            ai_future.add_done_callback(lambda done: upgrade_incident(incident_id, done))
+        
+        # The submitted input is only echoed back on request (?echo=1)
+        response = {
             'success': True,
-            'incident_report': result,
-            'original_input': data
-        })
+            'incident_report': slim_report(result),
+            'merged': merged,
+            'ai_pending': ai_pending
+        }
+        if wants_echo():
+            response['original_input'] = data
+        return jsonify(response)
         
     except ValueError as e:
-        app.logger.error(f"Validation error: {str(e)}")
+        app.logger.error("Validation error: %s", e)
         return jsonify({
             'error': f'Invalid input: {str(e)}',
             'success': False
         }), 400
         
     except Exception as e:
-        app.logger.error(f"Error processing incident report: {str(e)}")
+        app.logger.error("Error processing incident report: %s", e)
         return jsonify({
             'error': 'Failed to process incident report. Please try again.',
             'success': False
         }), 500
 
+@app.route('/report/batch', methods=['POST'])
+def report_batch():
+    """
+    Classify many incident messages in one request.
+    Accepts a JSON array, a JSON object with a 'messages' array, or a JSONL
+    body (application/x-ndjson) with one message per line. Each item is a
+    message string or an object in the same shape as a /report body.
+    Messages are classified with the local keyword classifier, and results
+    are returned in input order.
+    """
+    try:
+        items = parse_batch_items()
+    except ValueError as e:
+        return jsonify({
+            'error': f'Invalid input: {str(e)}',
+            'success': False
+        }), 400
+    
+    max_items = int(os.environ.get('BATCH_MAX_ITEMS', 10000))
+    if len(items) > max_items:
+        return jsonify({
+            'error': f'Batch exceeds the limit of {max_items} items',
+            'success': False
+        }), 413
+    
+    results = []
+    reports = []
+    for item in items:
+        try:
+            report = create_batch_item_report(item)
+        except ValueError as e:
+            results.append({'success': False, 'error': f'Invalid input: {str(e)}'})
+            continue
+        results.append(None)
+        reports.append(report)
+    
+    recorded = iter(record_incidents(reports))
+    for position, result in enumerate(results):
+        if result is None:
+            incident, merged = next(recorded)
+            results[position] = {'success': True, 'incident_report': slim_report(incident), 'merged': merged}
+    
+    return jsonify({
+        'success': True,
+        'count': len(results),
+        'results': results
+    })
+
+def parse_batch_items():
+    """Read batch items from a JSON or JSONL request body."""
+    mimetype = request.mimetype or ''
+    if mimetype in ('application/x-ndjson', 'application/jsonl', 'application/json-lines', 'text/plain'):
+        items = []
+        for line_number, line in enumerate(request.get_data(as_text=True).splitlines(), 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError:
+                raise ValueError(f"line {line_number} is not valid JSON")
+        return items
+    
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('messages')
+    if not isinstance(data, list):
+        raise ValueError("expected a JSON array of messages or a 'messages' field")
+    return data
+
+def create_batch_item_report(item):
+    """Create a report for one batch item without calling the AI service."""
+    if isinstance(item, str):
+        item = {'message': item}
+    if not isinstance(item, dict):
+        raise ValueError("each item must be a message string or an object")
+    
+    if 'incident_type' in item and 'location' in item:
+        return create_structured_report(item)
+    
+    message = str(item.get('message') or '').strip()
+    if not message:
+        raise ValueError("Message field is required and cannot be empty")
+    
+    coordinates = normalize_coordinates(item.get('coordinates'))
+    report = create_basic_report(message)
+    if coordinates:
+        report['coordinates'] = coordinates
+    return report
+
+def normalize_coordinates(value):
+    """
+    Normalize client-supplied coordinates to {'lat': float, 'lng': float}.
+    
+    Args:
+        value: Coordinates from a request body; empty values mean none given
+    
+    Returns:
+        dict or None: Normalized coordinates, or None when none were given
+    
+    Raises:
+        ValueError: If the coordinates are not a lat/lng pair within range
+    """
+    if value is None or value == '' or value == {}:
+        return None
+    position = coordinates_of({'coordinates': value}) if isinstance(value, dict) else None
+    if position is None:
+        raise ValueError("coordinates must be an object with numeric lat and lng within range")
+    return {'lat': position[0], 'lng': position[1]}
+
 def create_structured_report(data):
     """Create a structured report from form data."""
-    from datetime import datetime
-    
     # Validate required fields
     required_fields = ['incident_type', 'location', 'severity']
     for field in required_fields:
@@ -263,6 +1138,7 @@ def create_structured_report(data):
         'lanes_affected': data.get('lanes_affected'),
         'estimated_delay': data.get('estimated_delay'),
         'time_mentioned': data.get('time_mentioned'),
+        'coordinates': normalize_coordinates(data.get('coordinates')),
         'processed_at': datetime.utcnow().isoformat() + 'Z',
         'original_input': data,
         'processing_method': 'structured_form'
@@ -271,63 +1147,24 @@ def create_structured_report(data):
     # Clean up null/empty values
     for key, value in list(report.items()):
         if value == '' or value is None:
-            if key in ['direction', 'lanes_affected', 'estimated_delay', 'time_mentioned']:
+            if key in ['direction', 'lanes_affected', 'estimated_delay', 'time_mentioned', 'coordinates']:
                 report[key] = None
     
     return report
 
 def create_basic_report(message):
     """Create a basic report from natural language when AI is unavailable."""
-    from datetime import datetime
-    import re
-    
-    # Basic keyword detection
-    message_lower = message.lower()
-    
-    # Detect incident type
-    incident_type = 'other'
-    if any(word in message_lower for word in ['crash', 'accident', 'collision', 'wreck']):
-        incident_type = 'accident'
-    elif any(word in message_lower for word in ['speed trap', 'police', 'radar', 'cop']):
-        incident_type = 'speed_trap'
-    elif any(word in message_lower for word in ['construction', 'work zone', 'road work']):
-        incident_type = 'construction'
-    elif any(word in message_lower for word in ['stalled', 'broken down', 'disabled']):
-        incident_type = 'stalled_vehicle'
-    elif any(word in message_lower for word in ['debris', 'object in road']):
-        incident_type = 'debris'
-    elif any(word in message_lower for word in ['closed', 'closure', 'blocked']):
-        incident_type = 'road_closure'
-    
-    # Detect severity
-    severity = 'medium'
-    if any(word in message_lower for word in ['major', 'severe', 'serious', 'heavy traffic', 'major delays']):
-        severity = 'high'
-    elif any(word in message_lower for word in ['minor', 'small', 'light', 'cleared']):
-        severity = 'low'
-    
-    # Extract location (basic)
-    location = message
-    
-    # Detect direction
-    direction = None
-    direction_patterns = ['northbound', 'southbound', 'eastbound', 'westbound', 'north', 'south', 'east', 'west']
-    for pattern in direction_patterns:
-        if pattern in message_lower:
-            direction = pattern
-            break
-    
-    # Detect lanes affected
-    lanes_match = re.search(r'(\d+)\s*lane', message_lower)
-    lanes_affected = int(lanes_match.group(1)) if lanes_match else None
+    with stage_seconds.time(stage='keyword_parse'):
+        classification = classify_message(message)
     
     return {
-        'incident_type': incident_type,
-        'location': location,
-        'severity': severity,
+        'incident_type': classification['incident_type'],
+        'location': message,
+        'severity': classification['severity'],
         'description': f"Basic analysis of: {message}",
-        'direction': direction,
-        'lanes_affected': lanes_affected,
+        'direction': classification['direction'],
+        'lanes_affected': classification['lanes_affected'],
+        'confidence': classification['confidence'],
         'estimated_delay': None,
         'time_mentioned': None,
         'processed_at': datetime.utcnow().isoformat() + 'Z',
@@ -335,6 +1172,284 @@ def create_basic_report(message):
         'processing_method': 'basic_keyword_detection'
     }
 
+@app.route('/road-info', methods=['GET'])
+def road_info_lookup():
+    """Return the nearest mapped road from the offline index, without a Google lookup."""
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    if lat is None or lng is None:
+        return jsonify({
+            'error': 'Latitude and longitude are required',
+            'success': False
+        }), 400
+    
+    if road_index is None:
+        return jsonify({
+            'error': 'Road index not configured',
+            'success': False
+        }), 503
+    
+    road_info = road_index.road_info(lat, lng, ROAD_INDEX_MAX_DISTANCE_M)
+    if road_info is None:
+        return jsonify({
+            'error': 'No mapped road near these coordinates',
+            'success': False
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'road_info': road_info,
+        'coordinates': {'lat': lat, 'lng': lng}
+    })
+
+def parse_limit(value, default=100):
+    """Parse a result limit, rejecting values below 1 or above QUERY_MAX_LIMIT."""
+    max_limit = int(os.environ.get('QUERY_MAX_LIMIT', 1000))
+    limit = default if value is None else int(value)
+    if limit < 1 or limit > max_limit:
+        raise ValueError(f"limit must be between 1 and {max_limit}")
+    return limit
+
+@app.route('/incidents/nearby', methods=['GET'])
+def nearby_incidents():
+    """
+    Return incidents within a radius of a point, nearest first.
+    Query parameters: lat, lng, radius (meters), since (epoch or ISO 8601), limit.
+    """
+    try:
+        lat = request.args.get('lat', type=float)
+        lng = request.args.get('lng', type=float)
+        if lat is None or lng is None:
+            return jsonify({
+                'error': 'Latitude and longitude are required',
+                'success': False
+            }), 400
+        if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+            return jsonify({
+                'error': 'Latitude must be between -90 and 90 and longitude between -180 and 180',
+                'success': False
+            }), 400
+        
+        radius = request.args.get('radius', 1000.0, type=float)
+        max_radius = float(os.environ.get('NEARBY_MAX_RADIUS', 50000))
+        if radius <= 0 or radius > max_radius:
+            return jsonify({
+                'error': f'Radius must be between 0 and {max_radius:g} meters',
+                'success': False
+            }), 400
+        
+        since = parse_timestamp(request.args.get('since'))
+        limit = parse_limit(request.args.get('limit'))
+        
+        expire_incidents()
+        matches = incident_store.nearby(lat, lng, radius, since=since, limit=limit)
+        incidents = [dict(slim_report(report), distance_m=round(distance, 1)) for report, distance in matches]
+        
+        return jsonify({
+            'success': True,
+            'count': len(incidents),
+            'incidents': incidents
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'error': f'Invalid input: {str(e)}',
+            'success': False
+        }), 400
+
+@app.route('/incidents/route', methods=['POST'])
+def incidents_along_route():
+    """
+    Return live incidents along one or more planned routes, in driving order.
+    Accepts JSON with either polyline (a Google encoded polyline) or routes,
+    a list of {id, polyline} objects for fleet queries. Optional fields:
+    buffer_m (corridor half-width, default 100), since and limit (per route).
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        routes = data.get('routes')
+        if routes is None:
+            if not data.get('polyline'):
+                raise ValueError("polyline or routes is required")
+            routes = [{'id': data.get('id'), 'polyline': data['polyline']}]
+        if not isinstance(routes, list) or not routes:
+            raise ValueError("routes must be a non-empty list")
+        
+        max_routes = int(os.environ.get('ROUTE_MAX_ROUTES', 100))
+        if len(routes) > max_routes:
+            raise ValueError(f"at most {max_routes} routes per request")
+        
+        buffer_m = float(data.get('buffer_m', 100))
+        max_buffer = float(os.environ.get('ROUTE_MAX_BUFFER_M', 2000))
+        if buffer_m <= 0 or buffer_m > max_buffer:
+            raise ValueError(f"buffer_m must be between 0 and {max_buffer:g} meters")
+        since = parse_timestamp(data.get('since'))
+        limit = parse_limit(data.get('limit'))
+        
+        max_points = int(os.environ.get('ROUTE_MAX_POINTS', 10000))
+        # Routes are searched in pieces of at most 1 km; this caps the pieces
+        # across all routes in the request
+        pieces_left = int(os.environ.get('ROUTE_MAX_PIECES', 20000))
+        corridors = []
+        for position, route in enumerate(routes):
+            if not isinstance(route, dict) or not isinstance(route.get('polyline'), str):
+                raise ValueError(f"route {position} needs a polyline string")
+            points = decode_polyline(route['polyline'])
+            if len(points) > max_points:
+                raise ValueError(f"route {position} has more than {max_points} points")
+            corridor = RouteCorridor(points, buffer_m, max_pieces=pieces_left)
+            pieces_left -= len(corridor.pieces)
+            corridors.append((route.get('id', position), corridor))
+    except RouteTooLong as e:
+        return jsonify({
+            'error': f'Routes exceed the request limit: {str(e)}',
+            'success': False
+        }), 413
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'error': f'Invalid input: {str(e)}',
+            'success': False
+        }), 400
+    
+    expire_incidents()
+    results = []
+    for route_id, corridor in corridors:
+        matches = incident_store.along_route(corridor, since=since, limit=limit)
+        results.append({
+            'id': route_id,
+            'length_m': round(corridor.length_m, 1),
+            'count': len(matches),
+            'incidents': [dict(slim_report(report), distance_along_m=round(along, 1), offset_m=round(offset, 1))
+                          for report, along, offset in matches]
+        })
+    
+    return jsonify({
+        'success': True,
+        'buffer_m': buffer_m,
+        'routes': results
+    })
+
+@app.route('/incidents/stream', methods=['GET'])
+def incident_stream():
+    """
+    Stream new and updated incidents as server-sent events.
+    Subscribe with bbox=south,west,north,east or with lat, lng and radius
+    (meters). Incidents already in the area are sent first, then live
+    events; a comment line is sent every FEED_KEEPALIVE_SECONDS.
+    
+    Streams need a threaded worker: on a single-threaded one (gunicorn's
+    sync worker) one stream would block every other request, and the worker
+    timeout would kill it. At most STREAM_MAX_CLIENTS are open at a time.
+    """
+    if not request.environ.get('wsgi.multithread'):
+        return jsonify({
+            'error': 'Streaming requires a threaded worker (gunicorn -k gthread)',
+            'success': False
+        }), 503
+    
+    try:
+        if request.args.get('bbox'):
+            south, west, north, east = (float(value) for value in request.args['bbox'].split(','))
+            if not (-90.0 <= south <= north <= 90.0 and -180.0 <= west <= east <= 180.0):
+                raise ValueError("bbox must be south,west,north,east within -90..90 and -180..180")
+            subscription = incident_feed.subscribe_bbox(south, west, north, east)
+        else:
+            lat = request.args.get('lat', type=float)
+            lng = request.args.get('lng', type=float)
+            if lat is None or lng is None:
+                raise ValueError("bbox or lat and lng are required")
+            if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+                raise ValueError("lat must be between -90 and 90 and lng between -180 and 180")
+            radius = request.args.get('radius', 5000.0, type=float)
+            max_radius = float(os.environ.get('NEARBY_MAX_RADIUS', 50000))
+            if radius <= 0 or radius > max_radius:
+                raise ValueError(f"radius must be between 0 and {max_radius:g} meters")
+            subscription = incident_feed.subscribe_radius(lat, lng, radius)
+    except ValueError as e:
+        return jsonify({
+            'error': f'Invalid input: {str(e)}',
+            'success': False
+        }), 400
+    
+    if not stream_slots.try_acquire():
+        incident_feed.unsubscribe(subscription)
+        response = jsonify({
+            'error': 'Too many open streams, please retry shortly',
+            'success': False
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(int(os.environ.get('FEED_KEEPALIVE_SECONDS', 15)))
+        return response
+    
+    keepalive = float(os.environ.get('FEED_KEEPALIVE_SECONDS', 15))
+    expire_incidents()
+    snapshot = [incident for incident in incident_store.in_bbox(*subscription.bbox, limit=500)
+                if subscription.matches(*coordinates_of(incident))]
+    
+    def events():
+        try:
+            for incident in snapshot:
+                yield format_event('snapshot', incident)
+            while not subscription.closed:
+                frame = subscription.next_event(keepalive)
+                if frame is None:
+                    # Idle streams also drive expiry, so subscribers see
+                    # expired events without waiting for new reports
+                    expire_incidents()
+                    frame = ': keepalive\n\n'
+                yield frame
+            yield 'event: overflow\ndata: {}\n\n'
+        finally:
+            incident_feed.unsubscribe(subscription)
+    
+    response = Response(stream_with_context(events()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Runs when the server closes the response, even if the stream never started
+    response.call_on_close(stream_slots.release)
+    return response
+
+@app.route('/tiles/<int:z>/<int:x>/<int:y>', methods=['GET'])
+def heatmap_tile(z, x, y):
+    """
+    Return incident density for a map tile.
+    Optional query parameters: type (one incident_type) and minutes (count
+    only the most recent minutes of the rolling window).
+    """
+    if not heatmap_tiles.min_zoom <= z <= heatmap_tiles.max_zoom or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return jsonify({
+            'error': f'Tiles are available for zoom {heatmap_tiles.min_zoom} to {heatmap_tiles.max_zoom}',
+            'success': False
+        }), 404
+    
+    incident_type = request.args.get('type')
+    if incident_type is not None and incident_type not in VALID_TYPES:
+        return jsonify({
+            'error': f'Unknown incident type: {incident_type}',
+            'success': False
+        }), 400
+    minutes = request.args.get('minutes', type=float)
+    window_buckets = None
+    if minutes is not None:
+        if not (math.isfinite(minutes) and minutes > 0):
+            return jsonify({
+                'error': 'minutes must be a positive number',
+                'success': False
+            }), 400
+        # Longer than the rolling window means the whole window
+        window_seconds = min(minutes * 60, heatmap_tiles.buckets * heatmap_tiles.bucket_seconds)
+        window_buckets = max(1, math.ceil(window_seconds / heatmap_tiles.bucket_seconds))
+    
+    summary = heatmap_tiles.tile(z, x, y, time.time(), incident_type=incident_type, window_buckets=window_buckets)
+    return jsonify({
+        'success': True,
+        'z': z,
+        'x': x,
+        'y': y,
+        'resolution': heatmap_tiles.resolution,
+        'window_seconds': min(window_buckets or heatmap_tiles.buckets, heatmap_tiles.buckets) * heatmap_tiles.bucket_seconds,
+        **summary
+    })
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Simple health check endpoint."""
@@ -343,5 +1458,56 @@ def health_check():
         'service': 'traffic-incident-reporter'
     })
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Expose request, stage, fallback, upstream-error and token metrics for Prometheus."""
+    for phase, ms in startup_timer.phases.items():
+        startup_seconds.set(ms / 1000, phase=phase)
+    return Response(registry.render(), content_type=registry.CONTENT_TYPE)
+
+@app.route('/stats', methods=['GET'])
+def service_stats():
+    """Return internal cache and counter statistics."""
+    incident_reporter = backends.peek('llm')
+    upstreams = backends.peek('upstreams')
+    return jsonify({
+        'startup': {'phases_ms': startup_timer.phases, 'pid': os.getpid()},
+        'backends': backends.stats(),
+        'geocode_cache': geocode_cache.stats(),
+        'geocode_prewarm': prewarm_index.stats(),
+        'llm_cache': incident_reporter.cache.stats() if incident_reporter else None,
+        'llm_batching': incident_reporter.batcher.stats() if incident_reporter and incident_reporter.batcher else None,
+        'upstreams': upstreams.stats() if upstreams else None,
+        'ai_deadline': dict(ai_deadline_stats, deadline_ms=LLM_DEADLINE_SECONDS * 1000),
+        'routing': {
+            'threshold': LOCAL_CONFIDENCE_THRESHOLD,
+            'local': routing_stats['local'],
+            'ai': routing_stats['ai'],
+            'degraded': routing_stats['degraded'],
+            'confidence_histogram': {
+                f"{bucket / 10:.1f}-{(bucket + 1) / 10:.1f}": count
+                for bucket, count in enumerate(confidence_histogram)
+            }
+        },
+        'incident_store': incident_store.stats(),
+        'expiry': incident_expiry.stats(),
+        'heatmap': heatmap_tiles.stats(),
+        'responses': app.json.stats.stats(),
+        'admission': {
+            'workers': WORKER_COUNT,
+            'rate_limits': {endpoint: limiter.stats() for endpoint, limiter in rate_limiters.items()},
+            'in_flight': in_flight.stats(),
+            'ai_concurrency': ai_slots.stats(),
+            'streams': stream_slots.stats()
+        },
+        'clustering': incident_clusterer.stats(),
+        'feed': incident_feed.stats(),
+        'ingest_log': ingest_log.stats()
+    })
+
+startup_timer.record('app_load', startup_timer.elapsed())
+app.logger.info("Application loaded in %.1f ms", startup_timer.phases['app_load'],
+                extra={'phases_ms': startup_timer.phases})
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
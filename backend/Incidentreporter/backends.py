@@ -0,0 +1,183 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class LazyBackend:
+    """
+    A client or connection pool built on first use, once per process.
+
+    The instance remembers the pid that built it, so a process forked after
+    the build (a gunicorn worker under preload_app) builds its own instead
+    of reusing sockets and threads that did not survive the fork. A factory
+    that raises marks the backend unavailable; the build is retried after
+    retry_seconds rather than on every call.
+    """
+
+    def __init__(self, name: str, factory, retry_seconds: float = 30.0):
+        """
+        Args:
+            name (str): Backend name, used in logs and stats
+            factory (callable): Builds the backend; takes no arguments
+            retry_seconds (float): Wait after a failed build before trying again
+        """
+        self.name = name
+        self.factory = factory
+        self.retry_seconds = retry_seconds
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._warm_lock = threading.Lock()
+        self._warming_pid = None
+        self._instance = None
+        self._pid = None
+        self._error = None
+        self._failed_at = None
+        self.builds = 0
+        self.build_ms = None
+
+    def get(self):
+        """Return the backend, building it if needed. Returns None while it is unavailable."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return self._instance
+        with self._lock:
+            if self._pid == pid:
+                return self._instance
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_seconds:
+                return None
+            started = time.perf_counter()
+            try:
+                instance = self.factory()
+            except Exception as e:
+                self._error = str(e)
+                self._failed_at = time.monotonic()
+                self.logger.warning("Backend %s unavailable: %s", self.name, e)
+                return None
+            self.build_ms = round((time.perf_counter() - started) * 1000, 2)
+            self.builds += 1
+            self._instance = instance
+            self._error = None
+            self._failed_at = None
+            self._pid = pid
+            return instance
+
+    def peek(self):
+        """Return the instance if this process already built it, without building it."""
+        return self._instance if self.ready else None
+
+    def warm(self) -> bool:
+        """
+        Start building on a background thread, unless this process already
+        holds an instance or a build is under way.
+
+        Returns:
+            bool: True if a build thread was started
+        """
+        pid = os.getpid()
+        with self._warm_lock:
+            if self.ready or self._warming_pid == pid:
+                return False
+            self._warming_pid = pid
+
+        def run():
+            try:
+                self.get()
+            finally:
+                self._warming_pid = None
+
+        threading.Thread(target=run, name=f'{self.name}-warmup', daemon=True).start()
+        return True
+
+    @property
+    def ready(self) -> bool:
+        """True if this process already holds a built instance."""
+        return self._pid == os.getpid()
+
+    def stats(self) -> dict:
+        return {
+            'ready': self.ready,
+            'builds': self.builds,
+            'build_ms': self.build_ms,
+            'error': self._error
+        }
+
+
+class BackendRegistry:
+    """Named lazy backends with optional background warm-up."""
+
+    def __init__(self):
+        self._backends = {}
+
+    def register(self, name: str, factory, retry_seconds: float = 30.0) -> LazyBackend:
+        backend = LazyBackend(name, factory, retry_seconds)
+        self._backends[name] = backend
+        return backend
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._backends
+
+    def get(self, name: str):
+        """Return the named backend, or None while it is unavailable."""
+        return self._backends[name].get()
+
+    def peek(self, name: str):
+        """Return the named backend if it is registered and already built here, else None."""
+        backend = self._backends.get(name)
+        return backend.peek() if backend is not None else None
+
+    def peek_or_warm(self, name: str):
+        """
+        Return the named backend if this process already built it. Otherwise
+        start building it in the background and return None, so the caller
+        can fall back instead of waiting for the build.
+        """
+        backend = self._backends[name]
+        instance = backend.peek()
+        if instance is None:
+            backend.warm()
+        return instance
+
+    def warm(self, names=None) -> threading.Thread:
+        """
+        Build backends on a background thread so the first request does not pay for it.
+
+        Call this in each worker after fork (or after import when not
+        preloading); threads started before a fork do not carry over.
+        """
+        backends = [self._backends[name] for name in (names or self._backends)]
+
+        def run():
+            for backend in backends:
+                backend.get()
+
+        thread = threading.Thread(target=run, name='backend-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> dict:
+        return {name: backend.stats() for name, backend in self._backends.items()}
+
+
+class StartupTimer:
+    """Wall-clock durations of named startup phases, in milliseconds."""
+
+    def __init__(self):
+        self.phases = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = round(seconds * 1000, 2)
+
+    def elapsed(self) -> float:
+        """Seconds since the timer was created."""
+        return time.perf_counter() - self._started
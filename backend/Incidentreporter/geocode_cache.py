@@ -0,0 +1,215 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class GeocodeCache:
+    """
+    Reverse-geocode cache keyed on quantized coordinates.
+
+    Coordinates are snapped to a grid cell of 10^-precision degrees, so taps
+    from the same stretch of road share one entry. Entries are evicted
+    least-recently-used once the cache is full, and expire after a TTL.
+    """
+
+    def __init__(self, precision: int = 4, max_entries: int = 10000, ttl_seconds: float = 86400):
+        """
+        Args:
+            precision (int): Decimal places kept when quantizing lat/lng
+                (4 is roughly an 11 m cell)
+            max_entries (int): Maximum number of cached cells
+            ttl_seconds (float): Lifetime of a cached entry in seconds
+        """
+        self.precision = precision
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._scale = 10 ** precision
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key_for(self, lat: float, lng: float) -> tuple:
+        """Return the grid cell containing the given coordinates."""
+        return (math.floor(float(lat) * self._scale), math.floor(float(lng) * self._scale))
+
+    def get(self, lat: float, lng: float):
+        """Return the cached value for the cell, or None on a miss."""
+        key = self.key_for(lat, lng)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def contains(self, lat: float, lng: float) -> bool:
+        """Return True if the cell holds a live entry, without touching counters."""
+        key = self.key_for(lat, lng)
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def put(self, lat: float, lng: float, value) -> None:
+        """Store a value for the cell containing the given coordinates."""
+        key = self.key_for(lat, lng)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all cached entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'precision': self.precision,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class PrewarmIndex:
+    """
+    Geocode results for recent driver positions, looked up by distance.
+
+    Position updates arrive every ~100 m or 15 s, while GeocodeCache cells
+    are ~11 m, so a tap almost never lands in a pre-warmed cell. This index
+    instead returns the result of the nearest pre-warmed position within
+    max_distance_m. Positions are bucketed into cells of cell_deg degrees;
+    a lookup scans as many rings of cells as max_distance_m spans at that
+    latitude. Cells are evicted least-recently-used and entries expire
+    after a TTL.
+    """
+
+    METERS_PER_DEGREE = 111320.0
+
+    def __init__(self, max_distance_m: float = 150.0, cell_deg: float = 0.001, max_cells: int = 10000,
+                 ttl_seconds: float = 3600, per_cell: int = 4):
+        """
+        Args:
+            max_distance_m (float): Farthest pre-warmed position whose result is reused
+            cell_deg (float): Bucket size in degrees (0.001 is roughly 111 m of latitude)
+            max_cells (int): Maximum number of occupied cells
+            ttl_seconds (float): Lifetime of an entry in seconds
+            per_cell (int): Most recent positions kept per cell
+        """
+        self.max_distance_m = max_distance_m
+        self.cell_deg = cell_deg
+        self.max_cells = max_cells
+        self.ttl_seconds = ttl_seconds
+        self.per_cell = per_cell
+        self._cells = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _cell(self, lat: float, lng: float) -> tuple:
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def put(self, lat: float, lng: float, value) -> None:
+        """Store the geocode result for a reported position."""
+        lat, lng = float(lat), float(lng)
+        key = self._cell(lat, lng)
+        with self._lock:
+            entries = self._cells.get(key)
+            if entries is None:
+                entries = self._cells[key] = []
+            entries.append((time.monotonic() + self.ttl_seconds, lat, lng, value))
+            del entries[:-self.per_cell]
+            self._cells.move_to_end(key)
+            while len(self._cells) > self.max_cells:
+                self._cells.popitem(last=False)
+                self.evictions += 1
+
+    def nearest(self, lat: float, lng: float, count: bool = True):
+        """
+        Return the result stored for the nearest live position within
+        max_distance_m, or None.
+
+        Args:
+            count (bool): Whether the lookup counts towards the hit rate
+        """
+        lat, lng = float(lat), float(lng)
+        meters_per_lng = self.METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6)
+        lat_rings = math.ceil(self.max_distance_m / (self.cell_deg * self.METERS_PER_DEGREE))
+        # Near the poles the rings would wrap the world many times over
+        lng_rings = min(math.ceil(self.max_distance_m / (self.cell_deg * meters_per_lng)),
+                        math.ceil(180 / self.cell_deg))
+        row, col = self._cell(lat, lng)
+        now = time.monotonic()
+        best, best_distance = None, self.max_distance_m ** 2
+        with self._lock:
+            if (2 * lat_rings + 1) * (2 * lng_rings + 1) > len(self._cells):
+                # Fewer cells are occupied than the rings cover, so scan those
+                cells = [entries for (cell_row, cell_col), entries in self._cells.items()
+                         if abs(cell_row - row) <= lat_rings and abs(cell_col - col) <= lng_rings]
+            else:
+                cells = [self._cells.get((cell_row, cell_col), ())
+                         for cell_row in range(row - lat_rings, row + lat_rings + 1)
+                         for cell_col in range(col - lng_rings, col + lng_rings + 1)]
+            for entries in cells:
+                for expires_at, entry_lat, entry_lng, value in entries:
+                    if expires_at <= now:
+                        continue
+                    dy = (entry_lat - lat) * self.METERS_PER_DEGREE
+                    dx = (entry_lng - lng) * meters_per_lng
+                    distance = dx * dx + dy * dy
+                    if distance <= best_distance:
+                        best, best_distance = value, distance
+            if count:
+                if best is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+        return best
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'cells': len(self._cells),
+                'max_cells': self.max_cells,
+                'max_distance_m': self.max_distance_m,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+def create_http_session(pool_size: int = 20, retries: int = 1) -> requests.Session:
+    """Create a keep-alive HTTP session shared by all upstream calls."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
@@ -0,0 +1,71 @@
+import gc
+import os
+import time
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+timeout = int(os.environ.get('WORKER_TIMEOUT', 30))
+
+# The live incident set (store, clustering, expiry, feed and heatmap tiles)
+# and the rate limiters live in process memory, and the database is only
+# read back at startup. The service therefore runs as ONE worker process
+# and scales with threads; with WEB_CONCURRENCY > 1 each worker would only
+# see the reports that happened to reach it.
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+# Threaded workers are also required by /incidents/stream: each open stream
+# holds one thread (capped by STREAM_MAX_CLIENTS), and the gthread worker
+# keeps heartbeating while it does, so WORKER_TIMEOUT does not kill streams.
+# The endpoint answers 503 on a single-threaded (sync) worker.
+worker_class = 'gthread'
+
+# In async serving mode upstream I/O runs on a shared event loop, so request
+# threads are cheap and the worker can hold hundreds of in-flight reports.
+if os.environ.get('SERVING_MODE', 'sync') == 'async':
+    threads = int(os.environ.get('WORKER_THREADS', 200))
+else:
+    threads = int(os.environ.get('WORKER_THREADS', 32))
+
+# With PRELOAD_APP=true the app is imported once in the master and workers
+# are forked from it, so read-only state (keyword tables, road and geocoder
+# indexes) is shared copy-on-write and a recycled worker starts without
+# re-importing anything. Upstream clients are always built per worker.
+preload_app = os.environ.get('PRELOAD_APP', 'false').lower() == 'true'
+
+# Backends built in the background as soon as a worker is up
+WARM_BACKENDS = [name for name in os.environ.get('WARM_BACKENDS', 'llm,http').split(',') if name]
+
+_master_started = None
+
+
+def on_starting(server):
+    global _master_started
+    _master_started = time.perf_counter()
+
+
+def when_ready(server):
+    if preload_app:
+        # Move everything loaded so far out of the collector's reach, so
+        # collections in the workers do not touch (and copy) shared pages
+        gc.freeze()
+    server.log.info("Master ready in %.1f ms (preload_app=%s)",
+                    (time.perf_counter() - _master_started) * 1000, preload_app)
+    stream_limit = int(os.environ.get('STREAM_MAX_CLIENTS', 16))
+    if stream_limit >= threads:
+        server.log.warning("STREAM_MAX_CLIENTS=%d leaves no threads for other requests (threads=%d)",
+                           stream_limit, threads)
+    if workers > 1:
+        server.log.warning("WEB_CONCURRENCY=%d: live incidents, clustering, the SSE feed and heatmap tiles "
+                           "are per worker, so workers will not see each other's reports; rate and "
+                           "concurrency limits are split evenly across workers", workers)
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+
+
+def post_worker_init(worker):
+    from app import backends, startup_timer
+
+    boot_seconds = time.perf_counter() - worker.forked_at
+    startup_timer.record('worker_boot', boot_seconds)
+    worker.log.info("Worker %s booted in %.1f ms", worker.pid, boot_seconds * 1000)
+    backends.warm([name for name in WARM_BACKENDS if name in backends])
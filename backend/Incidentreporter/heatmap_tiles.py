@@ -0,0 +1,187 @@
+import math
+import threading
+
+import numpy as np
+
+MAX_MERCATOR_LAT = 85.05112878
+
+
+class HeatmapTiles:
+    """
+    Rolling incident density grids for slippy-map tiles.
+
+    Every tile at each zoom in [min_zoom, max_zoom] that has seen a report
+    holds sparse counts: a dict from cell code (type, row, col packed into
+    one int) to count, so memory grows with the number of occupied cells
+    rather than with types * resolution^2 per tile. Counts are kept per time
+    bucket in a ring of `buckets` entries, plus a running total per tile.
+    Adding a report touches one cell per zoom level. When a bucket falls out
+    of the window its counts are subtracted from the totals and dropped, so
+    the rolling window never needs a rescan. Once max_cells cells are
+    occupied, buckets older than the incoming report's are dropped early;
+    if there are none, the report is ignored.
+    """
+
+    def __init__(self, types: list, min_zoom: int = 6, max_zoom: int = 14, resolution: int = 16,
+                 bucket_seconds: float = 300, buckets: int = 12, max_cells: int = 500000):
+        """
+        Args:
+            types (list): Incident types, in code order; unknown types count as 'other'
+            min_zoom (int): Lowest zoom level aggregated
+            max_zoom (int): Highest zoom level aggregated
+            resolution (int): Bins per tile edge
+            bucket_seconds (float): Width of one time bucket
+            buckets (int): Number of buckets in the rolling window
+            max_cells (int): Cap on occupied cells across buckets and totals
+        """
+        self.types = list(types)
+        self.type_codes = {name: code for code, name in enumerate(self.types)}
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.resolution = resolution
+        self.bucket_seconds = bucket_seconds
+        self.buckets = buckets
+        self.max_cells = max_cells
+        self._other = self.type_codes.get('other', len(self.types) - 1)
+        self._shape = (len(self.types), resolution, resolution)
+        self._ring = {}
+        self._totals = {}
+        self._cells = 0
+        self._current = None
+        self._lock = threading.Lock()
+        self.added = 0
+        self.ignored = 0
+        self.evicted_buckets = 0
+
+    def add(self, lat: float, lng: float, incident_type: str, reported_at: float, now: float) -> bool:
+        """
+        Count one report.
+
+        Returns:
+            bool: False if the report is outside the map or the time window,
+                or the cell cap is full
+        """
+        if not -MAX_MERCATOR_LAT <= lat <= MAX_MERCATOR_LAT or not -180.0 <= lng <= 180.0:
+            self.ignored += 1
+            return False
+        fx, fy = mercator_fraction(lat, lng)
+        code = self.type_codes.get(incident_type, self._other)
+        bucket = int(min(reported_at, now) // self.bucket_seconds)
+        resolution = self.resolution
+
+        with self._lock:
+            self._advance(int(now // self.bucket_seconds))
+            if bucket <= self._current - self.buckets:
+                self.ignored += 1
+                return False
+            while self._cells >= self.max_cells:
+                oldest = min(self._ring, default=bucket)
+                if oldest >= bucket:
+                    # Only this report's bucket (or newer ones) fill the cap
+                    self.ignored += 1
+                    return False
+                self._drop(oldest)
+                self.evicted_buckets += 1
+            grids = self._ring.setdefault(bucket, {})
+            for z in range(self.min_zoom, self.max_zoom + 1):
+                span = (1 << z) * resolution
+                px = min(int(fx * span), span - 1)
+                py = min(int(fy * span), span - 1)
+                key = (z, px // resolution, py // resolution)
+                cell = (code * resolution + py % resolution) * resolution + px % resolution
+                for counts in (grids.setdefault(key, {}), self._totals.setdefault(key, {})):
+                    count = counts.get(cell)
+                    if count is None:
+                        self._cells += 1
+                        counts[cell] = 1
+                    else:
+                        counts[cell] = count + 1
+            self.added += 1
+        return True
+
+    def tile(self, z: int, x: int, y: int, now: float, incident_type: str = None, window_buckets: int = None):
+        """
+        Summarize the counts of one tile.
+
+        Args:
+            z, x, y (int): Tile coordinates
+            now (float): Current epoch time
+            incident_type (str): Only count this type
+            window_buckets (int): Only count the most recent buckets; the whole
+                window by default
+
+        Returns:
+            dict: Totals by type and the non-zero cells as [row, col, count]
+        """
+        key = (z, x, y)
+        counts = np.zeros(self._shape, dtype=np.int32)
+        flat = counts.reshape(-1)
+        with self._lock:
+            self._advance(int(now // self.bucket_seconds))
+            if window_buckets is None or window_buckets >= self.buckets:
+                sources = [self._totals.get(key)]
+            else:
+                sources = [self._ring.get(bucket, {}).get(key)
+                           for bucket in range(self._current - max(window_buckets, 1) + 1, self._current + 1)]
+            for source in sources:
+                if source:
+                    np.add.at(flat, np.fromiter(source.keys(), dtype=np.int64, count=len(source)),
+                              np.fromiter(source.values(), dtype=np.int32, count=len(source)))
+
+        by_type = counts.sum(axis=(1, 2))
+        if incident_type is not None:
+            code = self.type_codes.get(incident_type, self._other)
+            cells = counts[code]
+        else:
+            cells = counts.sum(axis=0)
+        rows, cols = np.nonzero(cells)
+        return {
+            'total': int(cells.sum()),
+            'by_type': {name: int(count) for name, count in zip(self.types, by_type.tolist()) if count},
+            'cells': [[row, col, count] for row, col, count in
+                      zip(rows.tolist(), cols.tolist(), cells[rows, cols].tolist())]
+        }
+
+    def stats(self) -> dict:
+        """Return tile, bucket, cell and report counters."""
+        with self._lock:
+            return {
+                'tiles': len(self._totals),
+                'buckets': len(self._ring),
+                'bucket_grids': sum(len(grids) for grids in self._ring.values()),
+                'cells': self._cells,
+                'max_cells': self.max_cells,
+                'evicted_buckets': self.evicted_buckets,
+                'added': self.added,
+                'ignored': self.ignored
+            }
+
+    def _advance(self, current: int) -> None:
+        """Move the window forward, subtracting buckets that fell out of it."""
+        if self._current is not None and current <= self._current:
+            return
+        self._current = current
+        for bucket in [bucket for bucket in self._ring if bucket <= current - self.buckets]:
+            self._drop(bucket)
+
+    def _drop(self, bucket: int) -> None:
+        """Remove a bucket and subtract its counts from the totals. Caller holds _lock."""
+        for key, grid in self._ring.pop(bucket).items():
+            total = self._totals[key]
+            for cell, count in grid.items():
+                remaining = total[cell] - count
+                if remaining:
+                    total[cell] = remaining
+                else:
+                    del total[cell]
+                    self._cells -= 1
+            self._cells -= len(grid)
+            if not total:
+                del self._totals[key]
+
+
+def mercator_fraction(lat: float, lng: float) -> tuple:
+    """Return Web Mercator (x, y) of a point as fractions of the world, in [0, 1]."""
+    fx = (lng + 180.0) / 360.0
+    fy = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0
+    return fx, fy
@@ -0,0 +1,210 @@
+import threading
+from collections import deque
+from datetime import datetime
+
+from incident_store import coordinates_of, parse_timestamp, report_timestamp
+from spatial_index import GridIndex, METERS_PER_DEGREE
+
+SEVERITY_RANK = {'low': 0, 'medium': 1, 'high': 2}
+
+
+def last_seen_timestamp(report: dict) -> float:
+    """Return when an incident was last confirmed, in epoch seconds."""
+    try:
+        confirmed = parse_timestamp(report.get('last_confirmed_at'))
+    except ValueError:
+        confirmed = None
+    return confirmed if confirmed is not None else report_timestamp(report)
+
+
+class IncidentClusterer:
+    """
+    Merges repeated sightings of the same incident into one report.
+
+    Recent incidents are kept in one grid per incident_type, with cells about
+    as wide as the match radius, so a new report is compared only against
+    the few incidents in the neighbouring cells. Incidents that have not been
+    confirmed within the time window are aged out through a FIFO queue, which
+    keeps each insert amortized O(1).
+    """
+
+    def __init__(self, store, radius_m: float = 150.0, window_seconds: float = 900.0):
+        """
+        Args:
+            store (IncidentStore): Live incident store that holds the clusters
+            radius_m (float): Maximum distance between duplicate sightings
+            window_seconds (float): Maximum time since the last confirmation
+        """
+        self.store = store
+        self.radius_m = radius_m
+        self.window_seconds = window_seconds
+        self._cell_size_deg = max(radius_m / METERS_PER_DEGREE, 1e-5)
+        self._grids = {}
+        self._last_seen = {}
+        self._recent = deque()
+        self._lock = threading.RLock()
+        self.merged = 0
+        self.created = 0
+
+    def locked(self):
+        """
+        Return the clusterer's lock for holding across several calls.
+
+        Work that follows a merge (scheduling expiry, logging, publishing)
+        must happen in merge order, or a slower thread can overwrite a newer
+        state with an older one. The lock is reentrant, so ingest and update
+        can be called while holding it.
+        """
+        return self._lock
+
+    def ingest(self, report: dict) -> tuple:
+        """
+        Add a report to the store, merging it into a matching recent incident.
+
+        Args:
+            report (dict): New incident report
+
+        Returns:
+            tuple: (incident, merged) where incident is the stored report and
+                merged is True when the report confirmed an existing incident
+        """
+        position = coordinates_of(report)
+        reported_at = report_timestamp(report)
+        incident_type = report.get('incident_type') or 'other'
+
+        with self._lock:
+            self._expire(reported_at)
+
+            if position is not None:
+                grid = self._grids.get(incident_type)
+                match = self._find_match(grid, position) if grid else None
+                if match is not None:
+                    incident = self._merge(match, report, reported_at)
+                    self._touch(incident_type, incident['id'], position, reported_at)
+                    self.merged += 1
+                    return incident, True
+
+            report.setdefault('confirmations', 1)
+            incident = self.store.add(report, reported_at=reported_at)
+            if position is not None:
+                self._touch(incident_type, incident['id'], position, reported_at)
+            self.created += 1
+            return incident, False
+
+    def restore(self, report: dict) -> dict:
+        """
+        Add a previously stored incident without trying to merge it.
+
+        Used when reloading incidents at startup; the incident joins the
+        recent window as of its last confirmation.
+        """
+        position = coordinates_of(report)
+        incident = self.store.add(report)
+        if position is not None:
+            with self._lock:
+                self._touch(report.get('incident_type') or 'other', incident['id'], position,
+                            last_seen_timestamp(incident))
+        return incident
+
+    def update(self, incident_id: str, fields: dict, remove=()):
+        """
+        Change fields of a live incident, moving it if its type changes.
+        Keys in remove are dropped from the report.
+
+        Returns the updated incident, or None if it is no longer in the store.
+        """
+        with self._lock:
+            incident = self.store.get(incident_id)
+            if incident is None:
+                return None
+            old_type = incident.get('incident_type') or 'other'
+            incident = self.store.update(incident_id, fields, remove)
+            new_type = incident.get('incident_type') or 'other'
+
+            entry = self._last_seen.get(incident_id)
+            if entry is not None and new_type != old_type:
+                old_grid = self._grids.get(old_type)
+                position = old_grid.position(incident_id) if old_grid else None
+                if position is not None:
+                    old_grid.remove(incident_id)
+                    if not len(old_grid):
+                        del self._grids[old_type]
+                    grid = self._grids.get(new_type)
+                    if grid is None:
+                        grid = self._grids[new_type] = GridIndex(self._cell_size_deg)
+                    grid.insert(incident_id, *position)
+                self._last_seen[incident_id] = (new_type, entry[1])
+            return incident
+
+    def retire(self, incident_id: str):
+        """
+        Remove an incident from the store and from the recent window.
+
+        Returns the removed incident, or None if it was not in the store.
+        """
+        with self._lock:
+            entry = self._last_seen.pop(incident_id, None)
+            if entry is not None:
+                grid = self._grids.get(entry[0])
+                if grid is not None:
+                    grid.remove(incident_id)
+                    if not len(grid):
+                        del self._grids[entry[0]]
+            return self.store.remove(incident_id)
+
+    def stats(self) -> dict:
+        """Return merge counters and the size of the recent window."""
+        with self._lock:
+            total = self.merged + self.created
+            return {
+                'tracked': len(self._last_seen),
+                'created': self.created,
+                'merged': self.merged,
+                'duplicate_rate': round(self.merged / total, 4) if total else 0.0
+            }
+
+    def _find_match(self, grid, position):
+        """Return the nearest live incident within the radius, or None."""
+        best = None
+        for incident_id, distance in grid.query_radius(position[0], position[1], self.radius_m):
+            if incident_id not in self.store:
+                continue
+            if best is None or distance < best[1]:
+                best = (incident_id, distance)
+        return self.store.get(best[0]) if best else None
+
+    def _merge(self, incident: dict, report: dict, reported_at: float) -> dict:
+        """Fold a duplicate report into an existing incident."""
+        fields = {
+            'confirmations': incident.get('confirmations', 1) + 1,
+            'last_confirmed_at': datetime.utcfromtimestamp(reported_at).isoformat() + 'Z'
+        }
+        severity = report.get('severity')
+        if SEVERITY_RANK.get(severity, -1) > SEVERITY_RANK.get(incident.get('severity'), -1):
+            fields['severity'] = severity
+        return self.store.update(incident['id'], fields)
+
+    def _touch(self, incident_type: str, incident_id: str, position: tuple, seen_at: float) -> None:
+        """Record a sighting of an incident in the recent window."""
+        grid = self._grids.get(incident_type)
+        if grid is None:
+            grid = self._grids[incident_type] = GridIndex(self._cell_size_deg)
+        if incident_id not in grid:
+            grid.insert(incident_id, *position)
+        self._last_seen[incident_id] = (incident_type, seen_at)
+        self._recent.append((seen_at, incident_id))
+
+    def _expire(self, now: float) -> None:
+        """Drop incidents whose last sighting fell outside the window."""
+        cutoff = now - self.window_seconds
+        while self._recent and self._recent[0][0] < cutoff:
+            seen_at, incident_id = self._recent.popleft()
+            entry = self._last_seen.get(incident_id)
+            if entry is None or entry[1] != seen_at:
+                continue
+            del self._last_seen[incident_id]
+            grid = self._grids.get(entry[0])
+            if grid is not None:
+                grid.remove(incident_id)
+                if not len(grid):
+                    del self._grids[entry[0]]
@@ -0,0 +1,386 @@
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Known report fields, in the order they are written back out
+FIELDS = [
+    'id', 'incident_type', 'location', 'severity', 'description', 'direction', 'lanes_affected',
+    'confidence', 'estimated_delay', 'time_mentioned', 'coordinates', 'road_info', 'reported_at',
+    'processed_at', 'last_confirmed_at', 'expires_at', 'confirmations', 'original_input',
+    'processing_method', 'status'
+]
+FIELD_BITS = {name: 1 << index for index, name in enumerate(FIELDS)}
+
+ENUM_FIELDS = ['incident_type', 'severity', 'direction', 'processing_method', 'status']
+TEXT_FIELDS = ['id', 'location', 'description', 'estimated_delay', 'time_mentioned', 'original_input']
+TIME_FIELDS = ['reported_at', 'processed_at', 'last_confirmed_at', 'expires_at']
+INT_FIELDS = ['lanes_affected', 'confirmations']
+
+FIELD_KINDS = dict(
+    [(name, 'text') for name in ENUM_FIELDS + TEXT_FIELDS]
+    + [(name, 'time') for name in TIME_FIELDS]
+    + [(name, 'int') for name in INT_FIELDS]
+    + [('confidence', 'float'), ('coordinates', 'coordinates'), ('road_info', 'object')]
+)
+
+# Fixed-width columns; enum and road_info columns hold interned codes. lat
+# and lng keep the exact coordinates, lat32 and lng32 are compact copies
+# that bounding-box filters scan first
+COLUMN_DTYPES = dict(
+    [('present', np.uint32), ('nulls', np.uint32), ('alive', np.bool_), ('timestamp', np.float64),
+     ('lat', np.float64), ('lng', np.float64), ('lat32', np.float32), ('lng32', np.float32),
+     ('confidence', np.float64), ('road_info', np.uint32)]
+    + [(name, np.uint32) for name in ENUM_FIELDS]
+    + [(name, np.int64) for name in TIME_FIELDS]
+    + [(name, np.int32) for name in INT_FIELDS]
+)
+OBJECT_COLUMNS = TEXT_FIELDS + ['extra']
+
+_EPOCH = datetime(1970, 1, 1)
+_INT32_RANGE = (-2 ** 31, 2 ** 31)
+
+
+def iso_to_micros(value):
+    """
+    Convert a naive UTC ISO timestamp ending in 'Z' to epoch microseconds.
+
+    Returns None for anything that would not format back to the same string.
+    """
+    if not isinstance(value, str) or not value.endswith('Z'):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value[:-1])
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        return None
+    micros = (parsed - _EPOCH) // timedelta(microseconds=1)
+    return micros if micros_to_iso(micros) == value else None
+
+
+def micros_to_iso(micros: int) -> str:
+    """Format epoch microseconds the way the report builders do."""
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat() + 'Z'
+
+
+class IncidentRecord:
+    """
+    Typed form of one incident report.
+
+    Known fields are held in slots: timestamps as epoch microseconds and
+    coordinates as plain floats. `present` and `nulls` are bitmasks over
+    FIELDS recording which keys the report had and which were None, so
+    to_report() gives back the same keys. Values that do not fit their
+    field's type, and unknown keys, are kept in `extra` unchanged.
+    """
+
+    __slots__ = ['present', 'nulls', 'extra', 'lat', 'lng'] + [name for name in FIELDS if name != 'coordinates']
+
+    def __init__(self):
+        self.present = 0
+        self.nulls = 0
+        self.extra = None
+        self.lat = None
+        self.lng = None
+        for name in FIELDS:
+            if name != 'coordinates':
+                setattr(self, name, None)
+
+    @classmethod
+    def from_report(cls, report: dict) -> 'IncidentRecord':
+        """Build a record from a report dict."""
+        record = cls()
+        extra = {}
+        for key, value in report.items():
+            bit = FIELD_BITS.get(key)
+            if bit is None or not record._set(key, value):
+                extra[key] = value
+                continue
+            record.present |= bit
+            if value is None:
+                record.nulls |= bit
+        record.extra = extra or None
+        return record
+
+    def to_report(self) -> dict:
+        """Return the record in the report dict shape it was built from."""
+        report = {}
+        for name in FIELDS:
+            bit = FIELD_BITS[name]
+            if not self.present & bit:
+                continue
+            if self.nulls & bit:
+                report[name] = None
+                continue
+            kind = FIELD_KINDS[name]
+            if kind == 'time':
+                report[name] = micros_to_iso(getattr(self, name))
+            elif kind == 'coordinates':
+                report[name] = {'lat': self.lat, 'lng': self.lng}
+            elif kind == 'object':
+                report[name] = dict(self.road_info)
+            else:
+                report[name] = getattr(self, name)
+        if self.extra:
+            report.update(self.extra)
+        return report
+
+    def _set(self, key: str, value) -> bool:
+        """Store a value in its slot. Returns False if it does not fit the field type."""
+        if value is None:
+            return True
+        kind = FIELD_KINDS[key]
+        if kind == 'text':
+            if not isinstance(value, str):
+                return False
+        elif kind == 'time':
+            value = iso_to_micros(value)
+            if value is None:
+                return False
+        elif kind == 'int':
+            if type(value) is not int or not _INT32_RANGE[0] <= value < _INT32_RANGE[1]:
+                return False
+        elif kind == 'float':
+            if type(value) is not float:
+                return False
+        elif kind == 'coordinates':
+            if not isinstance(value, dict) or value.keys() != {'lat', 'lng'}:
+                return False
+            lat, lng = value['lat'], value['lng']
+            if type(lat) not in (int, float) or type(lng) not in (int, float):
+                return False
+            self.lat = float(lat)
+            self.lng = float(lng)
+            return True
+        elif kind == 'object':
+            if not isinstance(value, dict):
+                return False
+        setattr(self, key, value)
+        return True
+
+
+class Interner:
+    """Reference-counted table mapping repeated values to small integer codes."""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+        self._refs = []
+        self._free = []
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def acquire(self, value) -> int:
+        """Return the code for a value, adding it if needed."""
+        code = self._codes.get(value)
+        if code is None:
+            if self._free:
+                code = self._free.pop()
+                self.values[code] = value
+                self._refs[code] = 0
+            else:
+                code = len(self.values)
+                self.values.append(value)
+                self._refs.append(0)
+            self._codes[value] = code
+        self._refs[code] += 1
+        return code
+
+    def release(self, code: int) -> None:
+        """Drop one reference to a code, freeing it when none are left."""
+        self._refs[code] -= 1
+        if not self._refs[code]:
+            del self._codes[self.values[code]]
+            self.values[code] = None
+            self._free.append(code)
+
+    def code(self, value):
+        """Return the code of a value without adding it, or None."""
+        return self._codes.get(value)
+
+
+class ColumnarIncidents:
+    """
+    Array-backed table of incident records.
+
+    Each field is a column: coordinates are float64, timestamps int64 epoch
+    microseconds, enum-like strings (type, severity, direction, ...) uint32
+    codes into reference-counted interning tables, and road_info dicts are
+    shared through an interning table of their JSON form. Free text stays in
+    Python lists. Removed rows are reused, and filters over the table run as
+    NumPy expressions over the columns.
+
+    Coordinates come back exactly as stored. Bounding-box filters scan
+    float32 copies of them first (float32 resolves longitude only to about
+    a metre) and then check the rows that pass against the float64 values.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._capacity = max(capacity, 1)
+        self._size = 0
+        self._free = []
+        self._row_of = {}
+        self.columns = {name: np.zeros(self._capacity, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+        self.objects = {name: [] for name in OBJECT_COLUMNS}
+        self.enums = {name: Interner() for name in ENUM_FIELDS}
+        self.shared = Interner()
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, incident_id: str) -> bool:
+        return incident_id in self._row_of
+
+    def put(self, record: IncidentRecord, timestamp: float) -> int:
+        """Insert or replace the row for a record's id. Returns the row number."""
+        row = self._row_of.get(record.id)
+        if row is not None:
+            self._release(row)
+        else:
+            row = self._allocate()
+            self._row_of[record.id] = row
+
+        columns = self.columns
+        present = record.present
+        nulls = record.nulls
+        columns['present'][row] = present
+        columns['nulls'][row] = nulls
+        columns['alive'][row] = True
+        columns['timestamp'][row] = timestamp
+        for name in ENUM_FIELDS:
+            value = getattr(record, name)
+            columns[name][row] = self.enums[name].acquire(value) if value is not None else 0
+        for name in TIME_FIELDS + INT_FIELDS:
+            value = getattr(record, name)
+            columns[name][row] = value if value is not None else 0
+        columns['confidence'][row] = record.confidence if record.confidence is not None else np.nan
+        columns['lat'][row] = columns['lat32'][row] = record.lat if record.lat is not None else np.nan
+        columns['lng'][row] = columns['lng32'][row] = record.lng if record.lng is not None else np.nan
+        if record.road_info is not None:
+            columns['road_info'][row] = self.shared.acquire(
+                json.dumps(record.road_info, sort_keys=True, separators=(',', ':'), default=str))
+        else:
+            columns['road_info'][row] = 0
+        for name in TEXT_FIELDS:
+            self.objects[name][row] = getattr(record, name)
+        self.objects['extra'][row] = (json.dumps(record.extra, separators=(',', ':'), default=str)
+                                      if record.extra else None)
+        return row
+
+    def get(self, incident_id: str):
+        """Return the record for an id, or None."""
+        row = self._row_of.get(incident_id)
+        return self.record(row) if row is not None else None
+
+    def timestamp(self, incident_id: str):
+        """Return the store timestamp of an id, or None."""
+        row = self._row_of.get(incident_id)
+        return float(self.columns['timestamp'][row]) if row is not None else None
+
+    def remove(self, incident_id: str):
+        """Delete the row for an id and return its record, or None."""
+        row = self._row_of.pop(incident_id, None)
+        if row is None:
+            return None
+        record = self.record(row)
+        self._release(row)
+        self.columns['alive'][row] = False
+        for name in OBJECT_COLUMNS:
+            self.objects[name][row] = None
+        self._free.append(row)
+        return record
+
+    def record(self, row: int) -> IncidentRecord:
+        """Rebuild the record stored in a row."""
+        columns = self.columns
+        record = IncidentRecord()
+        record.present = present = int(columns['present'][row])
+        record.nulls = nulls = int(columns['nulls'][row])
+        stored = present & ~nulls
+        for name in ENUM_FIELDS:
+            if stored & FIELD_BITS[name]:
+                setattr(record, name, self.enums[name].values[int(columns[name][row])])
+        for name in TIME_FIELDS + INT_FIELDS:
+            if stored & FIELD_BITS[name]:
+                setattr(record, name, int(columns[name][row]))
+        if stored & FIELD_BITS['confidence']:
+            record.confidence = float(columns['confidence'][row])
+        if stored & FIELD_BITS['coordinates']:
+            record.lat = float(columns['lat'][row])
+            record.lng = float(columns['lng'][row])
+        if stored & FIELD_BITS['road_info']:
+            record.road_info = json.loads(self.shared.values[int(columns['road_info'][row])])
+        for name in TEXT_FIELDS:
+            setattr(record, name, self.objects[name][row])
+        extra = self.objects['extra'][row]
+        record.extra = json.loads(extra) if extra else None
+        return record
+
+    def rows(self, south: float = None, west: float = None, north: float = None, east: float = None,
+             since: float = None, incident_type: str = None) -> np.ndarray:
+        """
+        Return the live rows matching every given filter, in row order.
+
+        Args:
+            south, west, north, east (float): Bounding box; all four or none
+            since (float): Minimum store timestamp in epoch seconds
+            incident_type (str): Only rows of this type
+        """
+        columns = self.columns
+        size = self._size
+        mask = columns['alive'][:size].copy()
+        if south is not None:
+            # Rounding to float32 preserves order, so this never drops a row
+            # inside the box; rows just outside it are removed below
+            lat = columns['lat32'][:size]
+            lng = columns['lng32'][:size]
+            mask &= (lat >= np.float32(south)) & (lat <= np.float32(north))
+            mask &= (lng >= np.float32(west)) & (lng <= np.float32(east))
+        if since is not None:
+            mask &= columns['timestamp'][:size] >= since
+        if incident_type is not None:
+            code = self.enums['incident_type'].code(incident_type)
+            if code is None:
+                return np.empty(0, dtype=np.int64)
+            bit = FIELD_BITS['incident_type']
+            mask &= (columns['incident_type'][:size] == code) & ((columns['present'][:size] & bit) != 0)
+            mask &= (columns['nulls'][:size] & bit) == 0
+        rows = np.flatnonzero(mask)
+        if south is not None:
+            lat = columns['lat'][rows]
+            lng = columns['lng'][rows]
+            rows = rows[(lat >= south) & (lat <= north) & (lng >= west) & (lng <= east)]
+        return rows
+
+    def stats(self) -> dict:
+        """Return row counts and the size of the fixed-width columns."""
+        return {
+            'capacity': self._capacity,
+            'column_bytes': sum(column.nbytes for column in self.columns.values()),
+            'interned_values': sum(len(interner) for interner in self.enums.values()) + len(self.shared)
+        }
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        if self._size == self._capacity:
+            self._capacity *= 2
+            for name, column in self.columns.items():
+                grown = np.zeros(self._capacity, dtype=column.dtype)
+                grown[:self._size] = column
+                self.columns[name] = grown
+        for values in self.objects.values():
+            values.append(None)
+        self._size += 1
+        return self._size - 1
+
+    def _release(self, row: int) -> None:
+        """Drop the interned references held by a row."""
+        stored = int(self.columns['present'][row]) & ~int(self.columns['nulls'][row])
+        for name in ENUM_FIELDS:
+            if stored & FIELD_BITS[name]:
+                self.enums[name].release(int(self.columns[name][row]))
+        if stored & FIELD_BITS['road_info']:
+            self.shared.release(int(self.columns['road_info'][row]))
@@ -0,0 +1,119 @@
+import heapq
+import threading
+from datetime import datetime
+
+# How long an unconfirmed incident stays live, by incident_type
+DEFAULT_TTL_SECONDS = {
+    'speed_trap': 30 * 60,
+    'debris': 60 * 60,
+    'stalled_vehicle': 60 * 60,
+    'accident': 2 * 3600,
+    'weather_hazard': 6 * 3600,
+    'road_closure': 12 * 3600,
+    'construction': 14 * 86400,
+    'other': 2 * 3600
+}
+
+# Lifetime multiplier by severity
+SEVERITY_TTL_FACTORS = {'low': 0.75, 'medium': 1.0, 'high': 1.5}
+
+
+class ExpiryPolicy:
+    """Lifetime of an incident by type, scaled by severity."""
+
+    def __init__(self, type_ttls: dict = None, severity_factors: dict = None, default_ttl: float = 2 * 3600):
+        """
+        Args:
+            type_ttls (dict): Seconds to live per incident_type, merged over
+                DEFAULT_TTL_SECONDS
+            severity_factors (dict): Multipliers per severity, merged over
+                SEVERITY_TTL_FACTORS
+            default_ttl (float): Seconds to live for unknown types
+        """
+        self.type_ttls = dict(DEFAULT_TTL_SECONDS, **(type_ttls or {}))
+        self.severity_factors = dict(SEVERITY_TTL_FACTORS, **(severity_factors or {}))
+        self.default_ttl = default_ttl
+
+    def ttl_for(self, report: dict) -> float:
+        """Return how many seconds a report stays live after its last confirmation."""
+        ttl = self.type_ttls.get(report.get('incident_type') or 'other', self.default_ttl)
+        return ttl * self.severity_factors.get(report.get('severity'), 1.0)
+
+
+class IncidentExpiry:
+    """
+    Deadline queue for live incidents.
+
+    Deadlines sit in a min-heap, so scheduling and expiring cost O(log n).
+    Rescheduling an incident (when it is re-confirmed or reclassified) just
+    pushes a new entry; the old one is skipped when it surfaces because it
+    no longer matches the incident's current deadline. The heap is rebuilt
+    when stale entries outnumber live ones.
+    """
+
+    def __init__(self, policy: ExpiryPolicy = None):
+        self.policy = policy or ExpiryPolicy()
+        self._heap = []
+        self._deadlines = {}
+        self._lock = threading.Lock()
+        self.expired = 0
+        self.extended = 0
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, incident: dict, seen_at: float) -> float:
+        """
+        Set an incident's deadline to seen_at plus its TTL.
+
+        Also stores the deadline in the report's 'expires_at' field.
+
+        Returns:
+            float: The deadline in epoch seconds
+        """
+        deadline = seen_at + self.policy.ttl_for(incident)
+        incident_id = incident['id']
+        with self._lock:
+            previous = self._deadlines.get(incident_id)
+            if previous is not None and deadline > previous:
+                self.extended += 1
+            self._deadlines[incident_id] = deadline
+            heapq.heappush(self._heap, (deadline, incident_id))
+            if len(self._heap) > 2 * len(self._deadlines) + 64:
+                self._heap = [(when, key) for key, when in self._deadlines.items()]
+                heapq.heapify(self._heap)
+        incident['expires_at'] = datetime.utcfromtimestamp(deadline).isoformat() + 'Z'
+        return deadline
+
+    def cancel(self, incident_id: str) -> None:
+        """Stop tracking an incident; its heap entry is dropped lazily."""
+        with self._lock:
+            self._deadlines.pop(incident_id, None)
+
+    def deadline(self, incident_id: str):
+        """Return an incident's deadline in epoch seconds, or None."""
+        with self._lock:
+            return self._deadlines.get(incident_id)
+
+    def pop_expired(self, now: float) -> list:
+        """Remove and return the ids of incidents whose deadline has passed."""
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, incident_id = heapq.heappop(self._heap)
+                if self._deadlines.get(incident_id) != deadline:
+                    continue
+                del self._deadlines[incident_id]
+                expired.append(incident_id)
+            self.expired += len(expired)
+        return expired
+
+    def stats(self) -> dict:
+        """Return tracked incident counts and expiry counters."""
+        with self._lock:
+            return {
+                'tracked': len(self._deadlines),
+                'heap_entries': len(self._heap),
+                'expired': self.expired,
+                'extended': self.extended
+            }
@@ -0,0 +1,170 @@
+import queue
+import threading
+
+import orjson
+
+from incident_store import coordinates_of
+from spatial_index import GridIndex, bbox_around, haversine_m
+
+
+class Subscription:
+    """
+    One client's view of the incident feed.
+
+    Events wait in a bounded queue. When a slow client lets the queue fill
+    up, the oldest event is dropped to make room, and after max_drops
+    dropped events the subscription is closed so the client reconnects and
+    resynchronizes instead of reading an ever more stale stream.
+    """
+
+    def __init__(self, south: float, west: float, north: float, east: float,
+                 center: tuple = None, radius_m: float = None, queue_size: int = 100, max_drops: int = 500):
+        self.bbox = (south, west, north, east)
+        self.center = center
+        self.radius_m = radius_m
+        self.max_drops = max_drops
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.closed = False
+        self.cells = []
+
+    def matches(self, lat: float, lng: float) -> bool:
+        """Return True if a point falls inside the subscribed area."""
+        south, west, north, east = self.bbox
+        if not (south <= lat <= north and west <= lng <= east):
+            return False
+        if self.center is not None:
+            return haversine_m(self.center[0], self.center[1], lat, lng) <= self.radius_m
+        return True
+
+    def offer(self, event: str) -> None:
+        """Queue an event without blocking the publisher."""
+        if self.closed:
+            return
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self.dropped += 1
+                if self.dropped > self.max_drops:
+                    self.closed = True
+                    return
+
+    def next_event(self, timeout: float):
+        """Return the next queued event, or None after the timeout."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class IncidentFeed:
+    """
+    Fan-out of new and updated incidents to area subscriptions.
+
+    Subscriptions are registered in every grid cell their area covers, so
+    publishing an incident only checks the subscribers of its own cell.
+    Subscriptions covering more than max_cells are kept in a separate list
+    that every publish checks.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.05, max_cells: int = 400, queue_size: int = 100, max_drops: int = 500):
+        self.queue_size = queue_size
+        self.max_drops = max_drops
+        self.max_cells = max_cells
+        self._grid = GridIndex(cell_size_deg)
+        self._cells = {}
+        self._wide = set()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe_bbox(self, south: float, west: float, north: float, east: float) -> Subscription:
+        """Subscribe to incidents inside a bounding box."""
+        subscription = Subscription(south, west, north, east,
+                                    queue_size=self.queue_size, max_drops=self.max_drops)
+        self._register(subscription)
+        return subscription
+
+    def subscribe_radius(self, lat: float, lng: float, radius_m: float) -> Subscription:
+        """Subscribe to incidents within radius_m of a point."""
+        south, west, north, east = bbox_around(lat, lng, radius_m)
+        subscription = Subscription(south, west, north, east, center=(lat, lng), radius_m=radius_m,
+                                    queue_size=self.queue_size, max_drops=self.max_drops)
+        self._register(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription from the feed."""
+        with self._lock:
+            self._wide.discard(subscription)
+            for cell in subscription.cells:
+                bucket = self._cells.get(cell)
+                if bucket is None:
+                    continue
+                bucket.discard(subscription)
+                if not bucket:
+                    del self._cells[cell]
+            subscription.cells = []
+
+    def publish(self, incident: dict, event: str = 'created') -> int:
+        """
+        Deliver an incident to every subscription whose area contains it.
+
+        Returns:
+            int: Number of subscriptions the event was queued for
+        """
+        position = coordinates_of(incident)
+        if position is None:
+            return 0
+        with self._lock:
+            candidates = list(self._cells.get(self._grid.cell_for(*position), ()))
+            candidates.extend(self._wide)
+        targets = [subscription for subscription in candidates if subscription.matches(*position)]
+        self.published += 1
+        if not targets:
+            return 0
+
+        # Encode once and share the frame between subscribers
+        frame = format_event(event, incident)
+        for subscription in targets:
+            subscription.offer(frame)
+        self.delivered += len(targets)
+        return len(targets)
+
+    def stats(self) -> dict:
+        """Return subscription and delivery counters."""
+        with self._lock:
+            subscriptions = set(self._wide)
+            for bucket in self._cells.values():
+                subscriptions.update(bucket)
+            return {
+                'subscriptions': len(subscriptions),
+                'wide_subscriptions': len(self._wide),
+                'indexed_cells': len(self._cells),
+                'published': self.published,
+                'delivered': self.delivered,
+                'dropped': sum(subscription.dropped for subscription in subscriptions)
+            }
+
+    def _register(self, subscription: Subscription) -> None:
+        # Count before listing, so a world-sized box never builds its cell list
+        if self._grid.cell_count(*subscription.bbox) > self.max_cells:
+            with self._lock:
+                self._wide.add(subscription)
+            return
+        cells = list(self._grid.cells_in_bbox(*subscription.bbox))
+        with self._lock:
+            subscription.cells = cells
+            for cell in cells:
+                self._cells.setdefault(cell, set()).add(subscription)
+
+
+def format_event(event: str, incident: dict) -> str:
+    """Encode an incident as a server-sent event frame."""
+    return f"event: {event}\ndata: {orjson.dumps(incident, default=str).decode('utf-8')}\n\n"
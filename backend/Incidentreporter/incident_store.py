@@ -0,0 +1,208 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from incident_columns import ColumnarIncidents, IncidentRecord
+from spatial_index import GridIndex
+
+
+def parse_timestamp(value):
+    """
+    Convert an epoch number or ISO 8601 string to epoch seconds.
+
+    Returns None when the value is empty. Raises ValueError when it
+    cannot be parsed.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'
+    parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def coordinates_of(report: dict):
+    """Return (lat, lng) floats from a report's coordinates, or None."""
+    coordinates = report.get('coordinates') or {}
+    try:
+        lat = float(coordinates['lat'])
+        lng = float(coordinates['lng'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        return None
+    return lat, lng
+
+
+def report_timestamp(report: dict) -> float:
+    """Return when a report was made, in epoch seconds."""
+    for field in ('reported_at', 'processed_at'):
+        try:
+            value = parse_timestamp(report.get(field))
+        except ValueError:
+            value = None
+        if value is not None:
+            return value
+    return time.time()
+
+
+class IncidentStore:
+    """
+    In-memory set of live incidents with a spatial grid index.
+
+    Reports are held as rows of a ColumnarIncidents table and rebuilt as
+    dicts when read, so callers get copies; changes are written back with
+    add() or update(). Reports that carry coordinates are also indexed by
+    location so nearby queries only touch the grid cells around the query
+    point instead of scanning every incident.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.01):
+        self._rows = ColumnarIncidents()
+        self._index = GridIndex(cell_size_deg)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, incident_id: str) -> bool:
+        return incident_id in self._rows
+
+    def add(self, report: dict, reported_at: float = None) -> dict:
+        """
+        Add a report to the store, assigning an id if it has none.
+
+        Args:
+            report (dict): Incident report as produced by the report builders
+            reported_at (float): Epoch timestamp; derived from the report if omitted
+
+        Returns:
+            dict: The report (with its 'id')
+        """
+        if not report.get('id'):
+            report['id'] = uuid.uuid4().hex
+        if reported_at is None:
+            reported_at = report_timestamp(report)
+        record = IncidentRecord.from_report(report)
+        position = coordinates_of(report)
+        with self._lock:
+            self._rows.put(record, reported_at)
+            if position is not None:
+                self._index.insert(report['id'], *position)
+            else:
+                self._index.remove(report['id'])
+        return report
+
+    def update(self, incident_id: str, fields: dict, remove=()):
+        """
+        Change fields of a stored incident, dropping the keys in remove.
+
+        Returns the updated report, or None if the id is unknown.
+        """
+        with self._lock:
+            record = self._rows.get(incident_id)
+            if record is None:
+                return None
+            report = record.to_report()
+            report.update(fields)
+            for key in remove:
+                report.pop(key, None)
+            return self.add(report, reported_at=self._rows.timestamp(incident_id))
+
+    def get(self, incident_id: str):
+        """Return a copy of the report with the given id, or None."""
+        with self._lock:
+            record = self._rows.get(incident_id)
+        return record.to_report() if record is not None else None
+
+    def timestamp(self, incident_id: str):
+        """Return the epoch timestamp of an incident, or None."""
+        with self._lock:
+            return self._rows.timestamp(incident_id)
+
+    def remove(self, incident_id: str):
+        """Remove and return an incident, or None if it is unknown."""
+        with self._lock:
+            self._index.remove(incident_id)
+            record = self._rows.remove(incident_id)
+        return record.to_report() if record is not None else None
+
+    def nearby(self, lat: float, lng: float, radius_m: float, since: float = None, limit: int = None) -> list:
+        """
+        Find incidents within radius_m of a point, nearest first.
+
+        Args:
+            lat (float): Query latitude
+            lng (float): Query longitude
+            radius_m (float): Search radius in meters
+            since (float): Only include incidents reported at or after this epoch time
+            limit (int): Maximum number of results
+
+        Returns:
+            list: (report, distance_m) tuples sorted by distance
+        """
+        with self._lock:
+            matches = []
+            for incident_id, distance in self._index.query_radius(lat, lng, radius_m):
+                if since is not None and self._rows.timestamp(incident_id) < since:
+                    continue
+                matches.append((incident_id, distance))
+            matches.sort(key=lambda match: match[1])
+            if limit is not None:
+                matches = matches[:limit]
+            records = [(self._rows.get(incident_id), distance) for incident_id, distance in matches]
+        return [(record.to_report(), distance) for record, distance in records]
+
+    def in_bbox(self, south: float, west: float, north: float, east: float, since: float = None, limit: int = None) -> list:
+        """Return reports inside a bounding box, optionally since an epoch time."""
+        with self._lock:
+            rows = self._rows.rows(south, west, north, east, since=since)
+            if limit is not None:
+                rows = rows[:limit]
+            records = [self._rows.record(row) for row in rows.tolist()]
+        return [record.to_report() for record in records]
+
+    def along_route(self, corridor, since: float = None, limit: int = None) -> list:
+        """
+        Find incidents inside a route corridor, in driving order.
+
+        Args:
+            corridor (RouteCorridor): Route and buffer to search
+            since (float): Only include incidents reported at or after this epoch time
+            limit (int): Maximum number of results
+
+        Returns:
+            list: (report, distance_along_m, offset_m) tuples sorted by distance along the route
+        """
+        with self._lock:
+            best = {}
+            for index, bbox in corridor.piece_bboxes():
+                for incident_id, lat, lng in self._index.query_bbox(*bbox):
+                    along, offset = corridor.project(index, lat, lng)
+                    if offset > corridor.buffer_m:
+                        continue
+                    current = best.get(incident_id)
+                    if current is None or offset < current[1]:
+                        best[incident_id] = (along, offset)
+            matches = [(incident_id, along, offset) for incident_id, (along, offset) in best.items()
+                       if since is None or self._rows.timestamp(incident_id) >= since]
+            matches.sort(key=lambda match: match[1])
+            if limit is not None:
+                matches = matches[:limit]
+            records = [(self._rows.get(incident_id), along, offset) for incident_id, along, offset in matches]
+        return [(record.to_report(), along, offset) for record, along, offset in records]
+
+    def stats(self) -> dict:
+        """Return the number of live incidents and the size of the columnar table."""
+        with self._lock:
+            return dict(self._rows.stats(), live_incidents=len(self._rows))
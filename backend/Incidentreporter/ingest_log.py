@@ -0,0 +1,324 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+
+from metrics import ingest_rejected
+
+# Records the writer rejects are kept here; replay only reads *.log files
+REJECTED_FILE = 'rejected.jsonl'
+
+
+class IngestLog:
+    """
+    Write-behind log of accepted incident reports.
+
+    Records are appended to a local segment file and fsynced before append()
+    returns. Concurrent appenders share one fsync: whichever thread syncs
+    first covers everything written so far. A background thread hands the
+    records to a writer callable in large batches, and a segment is deleted
+    once the writer has stored everything in it. Segments left behind by a
+    crash are replayed on startup.
+
+    A batch the writer fails on is retried one record at a time, and records
+    that still fail are set aside in a rejected file, so a single bad record
+    cannot hold up the log. Only errors listed in transient_errors, which
+    mean the store itself is unavailable, keep records queued for a retry.
+
+    Every process writes its own segments and holds an exclusive lock on
+    them, so replay never takes over a segment that a live worker still owns.
+    A process forked from one that holds a log (gunicorn with preload_app)
+    starts its own segment and flusher thread in the child.
+    """
+
+    def __init__(self, directory: str, writer, flush_interval: float = 0.2, max_batch: int = 1000,
+                 fsync: bool = True, transient_errors: tuple = (OSError,)):
+        """
+        Args:
+            directory (str): Directory holding the segment files
+            writer (callable): Stores a list of records
+            flush_interval (float): Seconds between background flushes
+            max_batch (int): Records per writer call
+            fsync (bool): Sync the segment to disk before append() returns
+            transient_errors (tuple): Writer exceptions that keep records
+                queued for the next attempt instead of setting them aside
+        """
+        self.directory = directory
+        self.writer = writer
+        self.transient_errors = transient_errors
+        self.logger = logging.getLogger(__name__)
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = []
+        self._sealed = []
+        self._sequence = 0
+        self._written = 0
+        self._synced = 0
+        self._syncing = False
+        self._closed = False
+        self._file = None
+        self._segment = None
+        self._open_segment()
+
+        self.appended = 0
+        self.fsyncs = 0
+        self.flushed = 0
+        self.flush_batches = 0
+        self.flush_failures = 0
+        self.rejected = 0
+        self.last_flush_ms = 0.0
+
+        self._thread = threading.Thread(target=self._run, name='ingest-log-flusher', daemon=True)
+        self._thread.start()
+        os.register_at_fork(before=self._before_fork, after_in_parent=self._after_fork_in_parent,
+                            after_in_child=self._after_fork_in_child)
+
+    def append(self, record: dict) -> None:
+        """Append a record and return once it is durable on local disk."""
+        self.append_many([record])
+
+    def append_many(self, records: list) -> None:
+        """Append several records with a single wait for the disk."""
+        self.wait(self.write_many(records))
+
+    def write_many(self, records: list) -> int:
+        """
+        Append records without waiting for the disk.
+
+        Records land in the log in the order write_many is called, so a
+        caller can write under its own lock and wait() after releasing it.
+
+        Returns:
+            int: Position to pass to wait()
+        """
+        data = ''.join(json.dumps(record, default=str, separators=(',', ':')) + '\n' for record in records)
+        with self._lock:
+            self._file.write(data)
+            self._pending.extend(records)
+            self._written += 1
+            self.appended += len(records)
+            position = self._written
+            backlog = len(self._pending)
+        if backlog >= self.max_batch:
+            self._wakeup.set()
+        return position
+
+    def wait(self, position: int) -> None:
+        """Return once everything up to a write_many position is durable on local disk."""
+        if self.fsync:
+            self._sync(position)
+
+    def flush(self) -> int:
+        """Hand every queued record to the writer now. Returns records written."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                records = self._pending
+                self._pending = []
+                # While a failed flush is being retried the active segment is
+                # left open, so a long database outage does not pile up files;
+                # replaying its already written records later is harmless
+                if not self._sealed:
+                    self._seal_segment()
+                segments = self._sealed
+                self._sealed = []
+
+            started = time.perf_counter()
+            try:
+                self._store(records)
+            except Exception:
+                self.flush_failures += 1
+                with self._lock:
+                    self._pending[:0] = records
+                    self._sealed[:0] = segments
+                raise
+
+            for path, f in segments:
+                os.remove(path)
+                f.close()
+            self.flushed += len(records)
+            self.flush_batches += 1
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+            return len(records)
+
+    def replay(self) -> int:
+        """
+        Write records from segments left by earlier processes, then delete them.
+
+        Replay stops, leaving the remaining segments in place, when the store
+        is unavailable; it never raises for the writer.
+
+        Returns:
+            int: Number of records replayed
+        """
+        replayed = 0
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if not name.endswith('.log') or path == self._segment:
+                continue
+            with open(path, 'r+', encoding='utf-8') as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    continue
+                records = read_segment(f)
+                try:
+                    self._store(records)
+                except Exception as e:
+                    self.logger.error("Replay stopped at %s, the store is unavailable: %s", name, e)
+                    return replayed
+                os.remove(path)
+            replayed += len(records)
+        return replayed
+
+    def close(self) -> None:
+        """Stop the flusher and write out anything still queued."""
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def stats(self) -> dict:
+        """Return append, sync and flush counters."""
+        with self._lock:
+            backlog = len(self._pending)
+        return {
+            'appended': self.appended,
+            'fsyncs': self.fsyncs,
+            'backlog': backlog,
+            'flushed': self.flushed,
+            'flush_batches': self.flush_batches,
+            'flush_failures': self.flush_failures,
+            'rejected': self.rejected,
+            'last_flush_ms': self.last_flush_ms
+        }
+
+    def _store(self, records: list) -> None:
+        """Hand records to the writer in batches, retrying a failed batch record by record."""
+        for start in range(0, len(records), self.max_batch):
+            batch = latest_versions(records[start:start + self.max_batch])
+            try:
+                self.writer(batch)
+            except self.transient_errors:
+                raise
+            except Exception:
+                for record in batch:
+                    try:
+                        self.writer([record])
+                    except self.transient_errors:
+                        raise
+                    except Exception:
+                        self._set_aside(record)
+
+    def _set_aside(self, record: dict) -> None:
+        """Move a record the writer keeps failing on to the rejected file."""
+        self.logger.exception("Setting aside incident record %s the writer rejected", record.get('id'))
+        with open(os.path.join(self.directory, REJECTED_FILE), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, default=str, separators=(',', ':')) + '\n')
+        self.rejected += 1
+        ingest_rejected.inc()
+
+    def _sync(self, position: int) -> None:
+        """Wait until the segment is synced past position, syncing if no one else is."""
+        with self._sync_lock:
+            while self._synced < position:
+                if self._syncing:
+                    self._sync_lock.wait()
+                    continue
+                self._syncing = True
+                self._sync_lock.release()
+                try:
+                    with self._lock:
+                        self._file.flush()
+                        target = self._written
+                        fd = os.dup(self._file.fileno())
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                    self.fsyncs += 1
+                finally:
+                    self._sync_lock.acquire()
+                    self._syncing = False
+                self._synced = max(self._synced, target)
+                self._sync_lock.notify_all()
+
+    def _before_fork(self) -> None:
+        # Empty the write buffer so the child's copy of the file has nothing
+        # left to write into the parent's segment
+        self._lock.acquire()
+        self._file.flush()
+
+    def _after_fork_in_parent(self) -> None:
+        self._lock.release()
+
+    def _after_fork_in_child(self) -> None:
+        """Give a forked child its own locks, segment and flusher thread."""
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = []
+        self._sealed = []
+        self._written = 0
+        self._synced = 0
+        self._syncing = False
+        # Closing our descriptor leaves the parent's lock on its segment in place
+        self._file.close()
+        self._open_segment()
+        self._thread = threading.Thread(target=self._run, name='ingest-log-flusher', daemon=True)
+        self._thread.start()
+
+    def _open_segment(self) -> None:
+        self._sequence += 1
+        name = f'{int(time.time() * 1000):015d}-{os.getpid()}-{self._sequence:06d}.log'
+        self._segment = os.path.join(self.directory, name)
+        self._file = open(self._segment, 'a', encoding='utf-8')
+        fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _seal_segment(self) -> None:
+        """Close the active segment for appends and start a new one. Caller holds _lock."""
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        # The sealed file stays open so its lock is held until it is deleted
+        self._sealed.append((self._segment, self._file))
+        self._open_segment()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                time.sleep(self.flush_interval)
+
+
+def read_segment(f) -> list:
+    """Parse the records of a segment file, ignoring a torn final line."""
+    records = []
+    for line in f:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            break
+    return records
+
+
+def latest_versions(records: list) -> list:
+    """Keep only the last record for each id, in order of first appearance."""
+    latest = {}
+    for record in records:
+        latest[record['id']] = record
+    return list(latest.values())
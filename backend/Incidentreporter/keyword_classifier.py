@@ -0,0 +1,179 @@
+import re
+
+# Keyword tables, in priority order. When a message matches several values
+# of the same field, the value listed first wins.
+INCIDENT_TYPE_KEYWORDS = [
+    ('accident', ['crash', 'accident', 'collision', 'wreck']),
+    ('speed_trap', ['speed trap', 'police', 'radar', 'cop']),
+    ('construction', ['construction', 'work zone', 'road work']),
+    ('stalled_vehicle', ['stalled', 'broken down', 'disabled']),
+    ('debris', ['debris', 'object in road']),
+    ('road_closure', ['closed', 'closure', 'blocked'])
+]
+
+# Incident types whose keywords routinely describe the scene of another,
+# higher-priority type ("2 lanes blocked" at a crash, police at a crash)
+# rather than a competing classification. They do not lower the confidence
+# when the type they accompany wins.
+ACCOMPANYING_TYPES = {
+    'road_closure': {'accident', 'construction', 'stalled_vehicle', 'debris'},
+    'speed_trap': {'accident', 'construction'},
+    'construction': {'accident'},
+    'stalled_vehicle': {'accident'},
+    'debris': {'accident', 'stalled_vehicle'}
+}
+
+SEVERITY_KEYWORDS = [
+    ('high', ['major', 'severe', 'serious', 'heavy traffic', 'major delays']),
+    ('low', ['minor', 'small', 'light', 'cleared'])
+]
+
+DIRECTION_KEYWORDS = [
+    (direction, [direction])
+    for direction in ['northbound', 'southbound', 'eastbound', 'westbound', 'north', 'south', 'east', 'west']
+]
+
+LANES_PATTERN = r'(?P<lanes>\d+)\s*lane'
+
+
+class KeywordClassifier:
+    """
+    Single-pass keyword classifier for incident messages.
+
+    All keywords are compiled into one prefix-factored alternation, so one
+    scan over the lowercased message finds every keyword occurrence along
+    with the first lane count. The alternation sits in a lookahead, so
+    matches may overlap and a keyword that starts inside another one
+    ("minorth" holds both "minor" and "north") is still found. Each hit is
+    mapped back to its field and priority, which gives the same answer as
+    checking every keyword list in turn with a substring test.
+    """
+
+    def __init__(self, incident_types=None, severities=None, directions=None, accompanying=None):
+        self._accompanying = ACCOMPANYING_TYPES if accompanying is None else accompanying
+        tables = {
+            'incident_type': incident_types or INCIDENT_TYPE_KEYWORDS,
+            'severity': severities or SEVERITY_KEYWORDS,
+            'direction': directions or DIRECTION_KEYWORDS
+        }
+        direct = {}
+        for field, table in tables.items():
+            for priority, (value, keywords) in enumerate(table):
+                for keyword in keywords:
+                    direct.setdefault(keyword, []).append((field, priority, value))
+
+        # Only the longest keyword starting at a position is matched, so a
+        # hit also stands for the keywords it begins with ("northbound" for
+        # "north"); each field value is kept once, at its best priority
+        self._lookup = {}
+        for keyword in direct:
+            hits = {}
+            for other, entries in direct.items():
+                if keyword.startswith(other):
+                    for field, priority, value in entries:
+                        if hits.get((field, value), priority) >= priority:
+                            hits[(field, value)] = priority
+            self._lookup[keyword] = [(field, priority, value) for (field, value), priority in hits.items()]
+
+        alternation = _trie_pattern(direct)
+        # The leading character class lets the engine skip positions where
+        # nothing can start before entering the lookahead
+        starts = ''.join(re.escape(char) for char in sorted({keyword[0] for keyword in direct}))
+        self._pattern = re.compile(f'(?=[{starts}\\d])(?=({alternation})|{LANES_PATTERN})')
+
+    def classify(self, message: str) -> dict:
+        """
+        Classify a message in one pass.
+
+        Args:
+            message (str): Natural language incident description
+
+        Returns:
+            dict: incident_type, severity, direction, lanes_affected and a
+                confidence score between 0 and 1
+        """
+        best = {}
+        type_hits = {}
+        lanes_affected = None
+        lookup = self._lookup
+
+        for match in self._pattern.finditer(message.lower()):
+            lanes = match.group('lanes')
+            if lanes is not None:
+                if lanes_affected is None:
+                    lanes_affected = int(lanes)
+                continue
+            for field, priority, value in lookup[match.group(1)]:
+                if field == 'incident_type':
+                    type_hits[value] = type_hits.get(value, 0) + 1
+                current = best.get(field)
+                if current is None or priority < current[0]:
+                    best[field] = (priority, value)
+
+        incident_type = best['incident_type'][1] if 'incident_type' in best else 'other'
+        rivals = {
+            value: count for value, count in type_hits.items()
+            if value == incident_type or incident_type not in self._accompanying.get(value, ())
+        }
+        return {
+            'incident_type': incident_type,
+            'severity': best['severity'][1] if 'severity' in best else 'medium',
+            'direction': best['direction'][1] if 'direction' in best else None,
+            'lanes_affected': lanes_affected,
+            'confidence': _confidence(rivals, incident_type, best, lanes_affected)
+        }
+
+
+def _confidence(type_hits: dict, incident_type: str, best: dict, lanes_affected) -> float:
+    """
+    Score how much a keyword classification can be trusted.
+
+    A single unambiguous incident type scores 0.8, plus a little for each
+    repeated type keyword and each extra detail found. Conflicting incident
+    types scale the score by the winning type's share of the hits, and a
+    message with no incident type keyword scores at most 0.2. type_hits
+    should leave out types that merely accompany the winner (see
+    ACCOMPANYING_TYPES), since the priority order already settles those.
+    """
+    details = sum(field in best for field in ('severity', 'direction')) + (lanes_affected is not None)
+    if not type_hits:
+        return 0.2 if details else 0.0
+    score = 0.8 + 0.05 * min(type_hits[incident_type] - 1, 2) + 0.05 * details
+    if len(type_hits) > 1:
+        score *= type_hits[incident_type] / sum(type_hits.values())
+    return round(min(score, 0.99), 2)
+
+
+def _trie_pattern(keywords) -> str:
+    """
+    Build a regex alternation of keywords factored by common prefix.
+
+    The regex engine tries alternatives one by one, so sharing prefixes
+    ("c(?:rash|op|...)") avoids re-testing the same characters at every
+    position. Optional suffixes are greedy, so the longest keyword wins.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            body = '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+default_classifier = KeywordClassifier()
+
+
+def classify_message(message: str) -> dict:
+    """Classify a message with the default keyword tables."""
+    return default_classifier.classify(message)
@@ -0,0 +1,100 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class MicroBatcher:
+    """
+    Collects items submitted by concurrent callers into small batches.
+
+    The first item starts a collection window. Items arriving within the
+    window, up to max_items, are handed to the handler in one call, and each
+    caller's Future receives its own result. Several batches can be in
+    flight at once, so a slow handler call does not hold up the next window.
+    """
+
+    def __init__(self, handler, window_seconds: float = 0.02, max_items: int = 16, max_concurrent_batches: int = 4):
+        """
+        Args:
+            handler (callable): Takes a list of items and returns a list of the
+                same length holding a result or an Exception for each item, or
+                a Future that resolves to such a list
+            window_seconds (float): How long to wait for more items after the first
+            max_items (int): Maximum number of items per batch
+            max_concurrent_batches (int): Maximum number of handler calls in flight;
+                a handler that returns a Future only holds its slot until it returns
+        """
+        self.handler = handler
+        self.window_seconds = window_seconds
+        self.max_items = max_items
+        self.logger = logging.getLogger(__name__)
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches, thread_name_prefix='llm-batch')
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self._collector = threading.Thread(target=self._collect, name='llm-batch-collector', daemon=True)
+        self._collector.start()
+
+    def submit(self, item) -> Future:
+        """Queue an item for the next batch and return a Future for its result."""
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def stats(self) -> dict:
+        """Return batch counters."""
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'items': self.items,
+                'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+                'window_ms': self.window_seconds * 1000,
+                'max_items': self.max_items
+            }
+
+    def _collect(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window_seconds
+            while len(batch) < self.max_items:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch: list) -> None:
+        items = [item for item, _ in batch]
+        try:
+            results = self.handler(items)
+        except Exception as e:
+            self._deliver(batch, e)
+            return
+        if isinstance(results, Future):
+            # The handler started the work elsewhere; free this thread and
+            # deliver when it finishes
+            results.add_done_callback(lambda done: self._deliver(batch, done.exception() or done.result()))
+        else:
+            self._deliver(batch, results)
+
+    def _deliver(self, batch: list, results) -> None:
+        if not isinstance(results, Exception) and len(results) != len(batch):
+            results = ValueError(f"Batch handler returned {len(results)} results for {len(batch)} items")
+        if isinstance(results, Exception):
+            self.logger.error("Batch of %d failed: %s", len(batch), results)
+            results = [results] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
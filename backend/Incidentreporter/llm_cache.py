@@ -0,0 +1,142 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+NUMBER_WORDS = {
+    'zero': '0', 'one': '1', 'two': '2', 'three': '3', 'four': '4', 'five': '5',
+    'six': '6', 'seven': '7', 'eight': '8', 'nine': '9', 'ten': '10',
+    'eleven': '11', 'twelve': '12', 'first': '1', 'second': '2', 'third': '3'
+}
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_message(message: str) -> str:
+    """
+    Reduce a message to a canonical cache key.
+
+    Case, punctuation and whitespace differences are dropped, number words
+    are turned into digits and leading zeros are stripped, so "Crash on I-5,
+    northbound!" and "crash on i 5 northbound" share one key.
+    """
+    text = unicodedata.normalize('NFKC', message).lower()
+    tokens = []
+    for token in _NON_ALNUM.sub(' ', text).split():
+        token = NUMBER_WORDS.get(token, token)
+        if token.isdigit():
+            token = token.lstrip('0') or '0'
+        tokens.append(token)
+    return ' '.join(tokens)
+
+
+class ClassificationCache:
+    """
+    Bounded LRU + TTL cache of LLM classification results.
+
+    Entries are kept in memory and, when a path is given, written through to
+    a SQLite file so they survive worker restarts and are shared by every
+    worker on the host.
+    """
+
+    def __init__(self, max_entries: int = 5000, ttl_seconds: float = 21600, path: str = None):
+        """
+        Args:
+            max_entries (int): Maximum number of entries kept in memory
+            ttl_seconds (float): Lifetime of an entry in seconds
+            path (str): Optional SQLite file backing the cache
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path:
+            self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS classifications '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            self._db.commit()
+
+    def get(self, key: str):
+        """Return the cached value for a key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT value, expires_at FROM classifications WHERE key = ? AND expires_at > ?',
+                    (key, now)
+                ).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value, row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: dict) -> None:
+        """Store a JSON-serializable value under a key."""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO classifications (key, value, expires_at) VALUES (?, ?, ?)',
+                        (key, json.dumps(value), expires_at)
+                    )
+                    self._db.commit()
+                except sqlite3.Error:
+                    self._db.rollback()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries from the backing file. Returns rows removed."""
+        if self._db is None:
+            return 0
+        with self._lock:
+            cursor = self._db.execute('DELETE FROM classifications WHERE expires_at <= ?', (time.time(),))
+            self._db.commit()
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'persistent': self._db is not None,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _remember(self, key: str, value: dict, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
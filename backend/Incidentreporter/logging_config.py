@@ -0,0 +1,68 @@
+import logging
+import time
+
+import orjson
+
+# Client libraries that log every HTTP request at INFO; kept at WARNING
+# unless the service itself runs at DEBUG
+CHATTY_LOGGERS = ('httpx', 'httpcore', 'urllib3', 'openai')
+
+# Attributes every LogRecord has; anything else on a record came from extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+def record_fields(record: logging.LogRecord) -> dict:
+    """Return the structured fields passed to a log call through extra={...}."""
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Human-readable lines with structured fields appended as key=value pairs."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = record_fields(record)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value!r}' if isinstance(value, str) and ' ' in value
+                                   else f'{key}={value}' for key, value in fields.items())
+        return line
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with structured fields as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        entry.update(record_fields(record))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode('utf-8')
+
+
+def configure_logging(level: str = 'INFO', fmt: str = 'text') -> None:
+    """
+    Install one root handler at the given level.
+
+    Args:
+        level (str): Level name, e.g. 'INFO' or 'DEBUG'; messages below it are
+            dropped before their arguments are formatted
+        fmt (str): 'json' for one JSON object per line, anything else for
+            key=value text
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(JSONFormatter() if fmt == 'json' else KeyValueFormatter())
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+    for name in CHATTY_LOGGERS:
+        logging.getLogger(name).setLevel(logging.NOTSET if root.level <= logging.DEBUG else logging.WARNING)
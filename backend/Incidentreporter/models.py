@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from flask_sqlalchemy import SQLAlchemy
+
+from incident_store import coordinates_of
+
+db = SQLAlchemy()
+
+
+class Incident(db.Model):
+    """Persisted incident report."""
+
+    __tablename__ = 'incidents'
+
+    id = db.Column(db.String(32), primary_key=True)
+    incident_type = db.Column(db.String(32), nullable=False, index=True)
+    severity = db.Column(db.String(16))
+    lat = db.Column(db.Float)
+    lng = db.Column(db.Float)
+    reported_at = db.Column(db.DateTime, nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, index=True)
+    report = db.Column(db.JSON, nullable=False)
+
+    @classmethod
+    def from_report(cls, report: dict, reported_at: float) -> 'Incident':
+        """Build a row from a report dict and its epoch timestamp."""
+        return cls(**cls.row_values(report, reported_at))
+
+    @staticmethod
+    def row_values(report: dict, reported_at: float) -> dict:
+        """Return the column values for a report, for bulk inserts."""
+        # Reports with unusable coordinates are stored without a position
+        # rather than failing the whole bulk insert
+        lat, lng = coordinates_of(report) or (None, None)
+        return {
+            'id': report['id'],
+            'incident_type': report.get('incident_type') or 'other',
+            'severity': report.get('severity'),
+            'lat': lat,
+            'lng': lng,
+            'reported_at': datetime.utcfromtimestamp(reported_at),
+            'expires_at': parse_utc(report.get('expires_at')),
+            'report': report
+        }
+
+
+def parse_utc(value):
+    """Parse a naive UTC ISO timestamp such as '2024-05-01T12:00:00Z', or return None."""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value[:-1] if value.endswith('Z') else value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo is None else None
@@ -0,0 +1,199 @@
+import argparse
+import csv
+import json
+import math
+import os
+
+import numpy as np
+
+from spatial_index import METERS_PER_DEGREE, bbox_around
+
+ARRAY_NAMES = ['lat', 'lng', 'address_offsets', 'street_ids', 'cell_keys', 'cell_offsets']
+
+_COLUMN_SPAN = 1_000_000
+
+
+class OfflineGeocoder:
+    """
+    Local reverse geocoder over a table of address points.
+
+    Points are sorted by grid cell so each cell's points are one contiguous
+    slice, located through a sorted array of cell keys. Coordinates,
+    offsets and the UTF-8 address blob are separate files that are
+    memory-mapped on load, so every worker process shares the same pages.
+    """
+
+    def __init__(self, arrays: dict, addresses, streets: list, cell_size_deg: float):
+        self.arrays = arrays
+        self.addresses = addresses
+        self.streets = streets
+        self.cell_size_deg = cell_size_deg
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    @classmethod
+    def build(cls, rows, cell_size_deg: float = 0.002) -> 'OfflineGeocoder':
+        """
+        Build a geocoder from address rows.
+
+        Args:
+            rows (iterable): Dicts with lat, lng, address and an optional street
+            cell_size_deg (float): Grid cell edge length in degrees
+
+        Returns:
+            OfflineGeocoder: The in-memory geocoder
+        """
+        lats = []
+        lngs = []
+        addresses = []
+        street_ids = []
+        streets = ['']
+        street_index = {'': 0}
+        for row in rows:
+            try:
+                lat = float(row['lat'])
+                lng = float(row['lng'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            address = (row.get('address') or '').strip()
+            if not address:
+                continue
+            street = (row.get('street') or '').strip()
+            if street not in street_index:
+                street_index[street] = len(streets)
+                streets.append(street)
+            lats.append(lat)
+            lngs.append(lng)
+            addresses.append(address.encode('utf-8'))
+            street_ids.append(street_index[street])
+
+        lat = np.asarray(lats, dtype=np.float64)
+        lng = np.asarray(lngs, dtype=np.float64)
+        keys = (np.floor(lat / cell_size_deg).astype(np.int64) * _COLUMN_SPAN
+                + np.floor(lng / cell_size_deg).astype(np.int64))
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        cell_keys, starts = np.unique(keys, return_index=True)
+
+        ordered = [addresses[i] for i in order]
+        lengths = np.fromiter((len(a) for a in ordered), dtype=np.int64, count=len(ordered))
+        address_offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        blob = np.frombuffer(b''.join(ordered), dtype=np.uint8)
+
+        arrays = {
+            'lat': lat[order].astype(np.float32),
+            'lng': lng[order].astype(np.float32),
+            'address_offsets': address_offsets,
+            'street_ids': np.asarray(street_ids, dtype=np.int32)[order],
+            'cell_keys': cell_keys,
+            'cell_offsets': np.append(starts, len(keys)).astype(np.int64)
+        }
+        return cls(arrays, blob, streets, cell_size_deg)
+
+    def save(self, directory: str) -> None:
+        """Write the geocoder as .npy files, an address blob and metadata."""
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, f'{name}.npy'), self.arrays[name])
+        with open(os.path.join(directory, 'addresses.bin'), 'wb') as f:
+            f.write(np.asarray(self.addresses, dtype=np.uint8).tobytes())
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({'cell_size_deg': self.cell_size_deg, 'streets': self.streets}, f)
+
+    @classmethod
+    def load(cls, directory: str) -> 'OfflineGeocoder':
+        """Open a saved geocoder with all arrays memory-mapped."""
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in ARRAY_NAMES}
+        blob_path = os.path.join(directory, 'addresses.bin')
+        if os.path.getsize(blob_path):
+            addresses = np.memmap(blob_path, dtype=np.uint8, mode='r')
+        else:
+            addresses = np.empty(0, dtype=np.uint8)
+        return cls(arrays, addresses, meta['streets'], meta['cell_size_deg'])
+
+    def _cells_near(self, lat: float, lng: float, max_distance_m: float) -> np.ndarray:
+        """Return positions in cell_keys of the occupied cells a max_distance_m circle overlaps."""
+        # A cell is narrower in meters east-west than north-south away from
+        # the equator; bbox_around widens the box to match, up to the whole world
+        south, west, north, east = bbox_around(lat, lng, max_distance_m)
+        min_row, max_row = math.floor(south / self.cell_size_deg), math.floor(north / self.cell_size_deg)
+        min_col, max_col = math.floor(west / self.cell_size_deg), math.floor(east / self.cell_size_deg)
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self.cell_keys):
+            # Near the poles the box covers more cells than are occupied, so
+            # scan the occupied cells in its rows instead of listing keys
+            start, end = np.searchsorted(self.cell_keys, [min_row * _COLUMN_SPAN + min_col,
+                                                          max_row * _COLUMN_SPAN + max_col + 1])
+            found = np.arange(start, end)
+            keys = self.cell_keys[found]
+            cols = keys - (keys + _COLUMN_SPAN // 2) // _COLUMN_SPAN * _COLUMN_SPAN
+            return found[(cols >= min_col) & (cols <= max_col)]
+        rows = np.arange(min_row, max_row + 1, dtype=np.int64)
+        cols = np.arange(min_col, max_col + 1, dtype=np.int64)
+        keys = (rows[:, None] * _COLUMN_SPAN + cols[None, :]).ravel()
+        positions = np.minimum(np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1)
+        return positions[self.cell_keys[positions] == keys]
+
+    def reverse(self, lat: float, lng: float, max_distance_m: float = 200.0):
+        """
+        Find the address point nearest to a location.
+
+        Args:
+            lat (float): Query latitude
+            lng (float): Query longitude
+            max_distance_m (float): Ignore points farther away than this
+
+        Returns:
+            dict: address, street and distance_m, or None
+        """
+        if not len(self.cell_keys):
+            return None
+        found = self._cells_near(lat, lng, max_distance_m)
+        if not len(found):
+            return None
+
+        best_point = None
+        best_distance = None
+        scale_x = METERS_PER_DEGREE * math.cos(math.radians(lat))
+        for start, end in zip(self.cell_offsets[found].tolist(), self.cell_offsets[found + 1].tolist()):
+            dx = (self.lng[start:end] - lng) * scale_x
+            dy = (self.lat[start:end] - lat) * METERS_PER_DEGREE
+            distances = np.hypot(dx, dy)
+            local = int(np.argmin(distances))
+            if best_distance is None or distances[local] < best_distance:
+                best_point = start + local
+                best_distance = float(distances[local])
+
+        if best_distance > max_distance_m:
+            return None
+        start, end = self.address_offsets[best_point:best_point + 2].tolist()
+        return {
+            'address': bytes(self.addresses[start:end]).decode('utf-8'),
+            'street': self.streets[int(self.street_ids[best_point])] or None,
+            'distance_m': round(best_distance, 1)
+        }
+
+    def reverse_many(self, points, max_distance_m: float = 200.0) -> list:
+        """Reverse-geocode (lat, lng) pairs in order; misses are None."""
+        return [self.reverse(lat, lng, max_distance_m) for lat, lng in points]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build an offline reverse geocoder.')
+    parser.add_argument('addresses', help='CSV with lat, lng, address and optional street columns')
+    parser.add_argument('output', help='Directory to write the geocoder to')
+    parser.add_argument('--cell-size', type=float, default=0.002, help='Grid cell size in degrees')
+    args = parser.parse_args()
+
+    with open(args.addresses, newline='') as f:
+        geocoder = OfflineGeocoder.build(csv.DictReader(f), cell_size_deg=args.cell_size)
+    geocoder.save(args.output)
+    print(f"Indexed {len(geocoder)} address points into {len(geocoder.cell_keys)} cells at {args.output}")
+
+
+if __name__ == '__main__':
+    main()
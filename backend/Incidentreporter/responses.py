@@ -0,0 +1,105 @@
+import threading
+import time
+
+import msgpack
+import orjson
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+from metrics import stage_seconds
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+
+
+class ResponseStats:
+    """Per-format response counts, payload bytes and encode time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._formats = {}
+
+    def record(self, fmt: str, size: int, seconds: float) -> None:
+        with self._lock:
+            entry = self._formats.setdefault(fmt, [0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += size
+            entry[2] += seconds
+
+    def stats(self) -> dict:
+        """Return totals and per-response averages by format."""
+        with self._lock:
+            return {
+                fmt: {
+                    'responses': count,
+                    'bytes': size,
+                    'avg_bytes': round(size / count, 1),
+                    'avg_encode_us': round(seconds / count * 1e6, 1)
+                }
+                for fmt, (count, size, seconds) in self._formats.items()
+            }
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that encodes with orjson and speaks MessagePack on request.
+
+    Installed as app.json, so every jsonify() call goes through it. Clients
+    that rank a MessagePack type above JSON in Accept get a MessagePack
+    body instead; everyone else gets compact UTF-8 JSON. Keys are not sorted.
+    """
+
+    sort_keys = False
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.stats = ResponseStats()
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self.encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def encode(self, obj) -> bytes:
+        """Serialize data to JSON bytes."""
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        started = time.perf_counter()
+        if wants_msgpack():
+            body = msgpack.packb(obj, default=self.default, use_bin_type=True)
+            fmt, mimetype = 'msgpack', 'application/msgpack'
+        else:
+            body = self.encode(obj)
+            fmt, mimetype = 'json', self.mimetype
+        elapsed = time.perf_counter() - started
+        self.stats.record(fmt, len(body), elapsed)
+        stage_seconds.observe(elapsed, stage='serialize')
+        response = self._app.response_class(body, mimetype=mimetype)
+        response.vary.add('Accept')
+        return response
+
+
+def wants_msgpack() -> bool:
+    """Return True if the request prefers MessagePack over JSON."""
+    accept = request.accept_mimetypes
+    best = accept.best_match(MSGPACK_MIMETYPES + ('application/json',), default='application/json')
+    return best in MSGPACK_MIMETYPES and accept[best] > accept['application/json']
+
+
+def wants_echo() -> bool:
+    """Return True if the client asked for its input to be echoed back (?echo=1)."""
+    return request.args.get('echo', '').lower() in ('1', 'true', 'yes')
+
+
+def slim_report(report: dict) -> dict:
+    """Return a report without its original_input, unless the client asked for it."""
+    if wants_echo() or 'original_input' not in report:
+        return report
+    return {key: value for key, value in report.items() if key != 'original_input'}
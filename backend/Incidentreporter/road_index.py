@@ -0,0 +1,305 @@
+import argparse
+import json
+import math
+import os
+
+import numpy as np
+
+from spatial_index import METERS_PER_DEGREE, bbox_around
+
+# OSM highway classes, in code order; unknown classes map to 'road'
+HIGHWAY_CLASSES = [
+    'road', 'motorway', 'motorway_link', 'trunk', 'trunk_link', 'primary', 'primary_link',
+    'secondary', 'secondary_link', 'tertiary', 'tertiary_link', 'unclassified',
+    'residential', 'living_street', 'service'
+]
+HIGHWAY_CODES = {name: code for code, name in enumerate(HIGHWAY_CLASSES)}
+
+# Road type buckets used by extract_road_info, with defaults for missing tags
+ROAD_TYPE_DEFAULTS = {
+    'highway': {'lanes': 4, 'speed': 70},
+    'arterial': {'lanes': 3, 'speed': 45},
+    'street': {'lanes': 2, 'speed': 35}
+}
+
+ARRAY_NAMES = ['lat1', 'lng1', 'lat2', 'lng2', 'highway', 'lanes', 'maxspeed', 'oneway', 'name_id',
+               'cell_keys', 'cell_offsets', 'cell_segments']
+
+_COLUMN_SPAN = 1_000_000
+
+
+def road_type_for(highway_class: str) -> str:
+    """Map an OSM highway class to the road_type used in road_info."""
+    base = highway_class.replace('_link', '')
+    if base in ('motorway', 'trunk'):
+        return 'highway'
+    if base in ('primary', 'secondary', 'tertiary'):
+        return 'arterial'
+    return 'street'
+
+
+def parse_maxspeed(value) -> int:
+    """Convert an OSM maxspeed tag to mph. Returns 0 when unknown."""
+    if value is None:
+        return 0
+    text = str(value).strip().lower()
+    try:
+        if text.endswith('mph'):
+            return int(round(float(text[:-3])))
+        return int(round(float(text.replace('km/h', '').replace('kmh', '')) * 0.621371))
+    except ValueError:
+        return 0
+
+
+def parse_lanes(value) -> int:
+    """Convert an OSM lanes tag to an integer. Returns 0 when unknown."""
+    try:
+        return max(0, min(int(float(str(value).split(';')[0])), 255))
+    except (TypeError, ValueError):
+        return 0
+
+
+class RoadSegmentIndex:
+    """
+    Offline nearest-road lookup over an OSM-style road extract.
+
+    Roads are stored as straight segments in flat NumPy arrays, bucketed into
+    a uniform grid kept in CSR form (sorted cell keys, offsets and segment
+    ids). Saved indexes are memory-mapped, so worker processes share the
+    pages and startup does not parse the extract again.
+    """
+
+    def __init__(self, arrays: dict, names: list, cell_size_deg: float):
+        self.arrays = arrays
+        self.names = names
+        self.cell_size_deg = cell_size_deg
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+
+    def __len__(self) -> int:
+        return len(self.lat1)
+
+    @classmethod
+    def build(cls, features, cell_size_deg: float = 0.005) -> 'RoadSegmentIndex':
+        """
+        Build an index from GeoJSON features.
+
+        Args:
+            features (iterable): GeoJSON Feature dicts with LineString or
+                MultiLineString geometry and OSM tags (highway, lanes,
+                maxspeed, oneway, name) in their properties
+            cell_size_deg (float): Grid cell edge length in degrees
+
+        Returns:
+            RoadSegmentIndex: The in-memory index
+        """
+        columns = {name: [] for name in ['lat1', 'lng1', 'lat2', 'lng2', 'highway', 'lanes',
+                                         'maxspeed', 'oneway', 'name_id']}
+        names = ['']
+        name_ids = {'': 0}
+
+        for feature in features:
+            properties = feature.get('properties') or {}
+            geometry = feature.get('geometry') or {}
+            if not properties.get('highway'):
+                continue
+            if geometry.get('type') == 'LineString':
+                lines = [geometry.get('coordinates') or []]
+            elif geometry.get('type') == 'MultiLineString':
+                lines = geometry.get('coordinates') or []
+            else:
+                continue
+
+            name = properties.get('name') or properties.get('ref') or ''
+            if name not in name_ids:
+                name_ids[name] = len(names)
+                names.append(name)
+            attributes = (
+                HIGHWAY_CODES.get(properties['highway'], 0),
+                parse_lanes(properties.get('lanes')),
+                parse_maxspeed(properties.get('maxspeed')),
+                1 if str(properties.get('oneway', 'no')).lower() in ('yes', 'true', '1') else 0,
+                name_ids[name]
+            )
+
+            for line in lines:
+                for (lng1, lat1, *_), (lng2, lat2, *_) in zip(line, line[1:]):
+                    columns['lat1'].append(lat1)
+                    columns['lng1'].append(lng1)
+                    columns['lat2'].append(lat2)
+                    columns['lng2'].append(lng2)
+                    for column, value in zip(['highway', 'lanes', 'maxspeed', 'oneway', 'name_id'], attributes):
+                        columns[column].append(value)
+
+        dtypes = {'lat1': np.float32, 'lng1': np.float32, 'lat2': np.float32, 'lng2': np.float32,
+                  'highway': np.uint8, 'lanes': np.uint8, 'maxspeed': np.uint16, 'oneway': np.uint8,
+                  'name_id': np.int32}
+        arrays = {name: np.asarray(values, dtype=dtypes[name]) for name, values in columns.items()}
+        arrays.update(cls._build_grid(arrays, cell_size_deg))
+        return cls(arrays, names, cell_size_deg)
+
+    @staticmethod
+    def _build_grid(arrays: dict, cell_size_deg: float) -> dict:
+        """Bucket segments into every grid cell their bounding box touches."""
+        lat1 = arrays['lat1'].astype(np.float64)
+        lat2 = arrays['lat2'].astype(np.float64)
+        lng1 = arrays['lng1'].astype(np.float64)
+        lng2 = arrays['lng2'].astype(np.float64)
+        min_rows = np.floor(np.minimum(lat1, lat2) / cell_size_deg).astype(np.int64)
+        max_rows = np.floor(np.maximum(lat1, lat2) / cell_size_deg).astype(np.int64)
+        min_cols = np.floor(np.minimum(lng1, lng2) / cell_size_deg).astype(np.int64)
+        max_cols = np.floor(np.maximum(lng1, lng2) / cell_size_deg).astype(np.int64)
+
+        keys = []
+        segments = []
+        for segment in range(len(lat1)):
+            for row in range(min_rows[segment], max_rows[segment] + 1):
+                for col in range(min_cols[segment], max_cols[segment] + 1):
+                    keys.append(row * _COLUMN_SPAN + col)
+                    segments.append(segment)
+
+        keys = np.asarray(keys, dtype=np.int64)
+        segments = np.asarray(segments, dtype=np.int32)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        segments = segments[order]
+        cell_keys, starts = np.unique(keys, return_index=True)
+        cell_offsets = np.append(starts, len(keys)).astype(np.int64)
+        return {'cell_keys': cell_keys, 'cell_offsets': cell_offsets, 'cell_segments': segments}
+
+    def save(self, directory: str) -> None:
+        """Write the index as .npy files plus a metadata file."""
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, f'{name}.npy'), self.arrays[name])
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({'cell_size_deg': self.cell_size_deg, 'names': self.names}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'RoadSegmentIndex':
+        """Open a saved index, memory-mapping its arrays by default."""
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mode) for name in ARRAY_NAMES}
+        return cls(arrays, meta['names'], meta['cell_size_deg'])
+
+    def _cells_near(self, lat: float, lng: float, max_distance_m: float) -> np.ndarray:
+        """Return positions in cell_keys of the occupied cells a max_distance_m circle overlaps."""
+        # A cell is narrower in meters east-west than north-south away from
+        # the equator; bbox_around widens the box to match, up to the whole world
+        south, west, north, east = bbox_around(lat, lng, max_distance_m)
+        min_row, max_row = math.floor(south / self.cell_size_deg), math.floor(north / self.cell_size_deg)
+        min_col, max_col = math.floor(west / self.cell_size_deg), math.floor(east / self.cell_size_deg)
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self.cell_keys):
+            # Near the poles the box covers more cells than are occupied, so
+            # scan the occupied cells in its rows instead of listing keys
+            start, end = np.searchsorted(self.cell_keys, [min_row * _COLUMN_SPAN + min_col,
+                                                          max_row * _COLUMN_SPAN + max_col + 1])
+            found = np.arange(start, end)
+            keys = self.cell_keys[found]
+            cols = keys - (keys + _COLUMN_SPAN // 2) // _COLUMN_SPAN * _COLUMN_SPAN
+            return found[(cols >= min_col) & (cols <= max_col)]
+        rows = np.arange(min_row, max_row + 1, dtype=np.int64)
+        cols = np.arange(min_col, max_col + 1, dtype=np.int64)
+        keys = (rows[:, None] * _COLUMN_SPAN + cols[None, :]).ravel()
+        positions = np.minimum(np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1)
+        return positions[self.cell_keys[positions] == keys]
+
+    def candidates(self, lat: float, lng: float, max_distance_m: float = 50.0) -> np.ndarray:
+        """Return ids of segments in the cells within max_distance_m of a point."""
+        if not len(self.cell_keys):
+            return np.empty(0, dtype=np.int32)
+        found = self._cells_near(lat, lng, max_distance_m)
+        if not len(found):
+            return np.empty(0, dtype=np.int32)
+        starts = self.cell_offsets[found].tolist()
+        ends = self.cell_offsets[found + 1].tolist()
+        # Segments spanning several cells may appear more than once; that is
+        # harmless for a nearest-distance search
+        return np.concatenate([self.cell_segments[start:end] for start, end in zip(starts, ends)])
+
+    def nearest(self, lat: float, lng: float, max_distance_m: float = 50.0):
+        """
+        Find the road segment closest to a point.
+
+        Args:
+            lat (float): Query latitude
+            lng (float): Query longitude
+            max_distance_m (float): Ignore segments farther away than this
+
+        Returns:
+            dict: highway class, road_type, lanes, maxspeed_mph, oneway, name,
+                bearing (degrees from north) and distance_m, or None
+        """
+        segments = self.candidates(lat, lng, max_distance_m)
+        if not len(segments):
+            return None
+
+        # Project onto a local plane in meters around the query point
+        scale_x = METERS_PER_DEGREE * math.cos(math.radians(lat))
+        ax = (self.lng1[segments] - lng) * scale_x
+        ay = (self.lat1[segments] - lat) * METERS_PER_DEGREE
+        bx = (self.lng2[segments] - lng) * scale_x
+        by = (self.lat2[segments] - lat) * METERS_PER_DEGREE
+        dx = bx - ax
+        dy = by - ay
+        length_sq = dx * dx + dy * dy
+        t = np.clip(-(ax * dx + ay * dy) / np.where(length_sq > 0, length_sq, 1), 0, 1)
+        distances = np.hypot(ax + t * dx, ay + t * dy)
+
+        best = int(np.argmin(distances))
+        distance = float(distances[best])
+        if distance > max_distance_m:
+            return None
+
+        segment = int(segments[best])
+        highway = HIGHWAY_CLASSES[int(self.highway[segment])]
+        bearing = math.degrees(math.atan2(float(dx[best]), float(dy[best]))) % 360
+        return {
+            'highway': highway,
+            'road_type': road_type_for(highway),
+            'lanes': int(self.lanes[segment]) or None,
+            'maxspeed_mph': int(self.maxspeed[segment]) or None,
+            'oneway': bool(self.oneway[segment]),
+            'name': self.names[int(self.name_id[segment])] or None,
+            'bearing': round(bearing, 1),
+            'distance_m': round(distance, 1)
+        }
+
+    def road_info(self, lat: float, lng: float, max_distance_m: float = 50.0):
+        """Return a road_info dict for the nearest segment, or None."""
+        segment = self.nearest(lat, lng, max_distance_m)
+        if segment is None:
+            return None
+        defaults = ROAD_TYPE_DEFAULTS[segment['road_type']]
+        return {
+            'road_type': segment['road_type'],
+            'speed_limit_estimate': segment['maxspeed_mph'] or defaults['speed'],
+            'typical_lanes': segment['lanes'] or defaults['lanes'],
+            'is_highway': segment['road_type'] == 'highway',
+            'is_intersection': False,
+            'highway_class': segment['highway'],
+            'road_name': segment['name'],
+            'bearing': segment['bearing'],
+            'oneway': segment['oneway'],
+            'source': 'road_index'
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build an offline road segment index.')
+    parser.add_argument('extract', help='GeoJSON FeatureCollection of OSM ways (e.g. from osmium export)')
+    parser.add_argument('output', help='Directory to write the index to')
+    parser.add_argument('--cell-size', type=float, default=0.005, help='Grid cell size in degrees')
+    args = parser.parse_args()
+
+    with open(args.extract) as f:
+        features = json.load(f).get('features', [])
+    index = RoadSegmentIndex.build(features, cell_size_deg=args.cell_size)
+    index.save(args.output)
+    print(f"Indexed {len(index)} segments into {len(index.cell_keys)} cells at {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import math
+
+from spatial_index import METERS_PER_DEGREE, bbox_around, haversine_m
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> list:
+    """
+    Decode a Google encoded polyline into (lat, lng) pairs.
+
+    Raises ValueError when the string is truncated or malformed.
+    """
+    points = []
+    index = 0
+    lat = 0
+    lng = 0
+    factor = 10 ** precision
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            shift = 0
+            value = 0
+            while True:
+                if index >= length:
+                    raise ValueError("truncated polyline")
+                byte = ord(encoded[index]) - 63
+                index += 1
+                if not 0 <= byte < 64:
+                    raise ValueError("invalid character in polyline")
+                value |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        points.append((lat / factor, lng / factor))
+    return points
+
+
+class RouteTooLong(ValueError):
+    """Raised when a route would be split into more pieces than allowed."""
+
+
+class RouteCorridor:
+    """
+    Buffer of buffer_m meters around a route polyline.
+
+    The route is split into pieces no longer than max_piece_m, and each
+    piece is searched through its own buffered bounding box, so the number
+    of index cells visited grows with the route length rather than with
+    the area of the route's overall bounding box.
+    """
+
+    def __init__(self, points: list, buffer_m: float, max_piece_m: float = 1000.0, max_pieces: int = None):
+        """
+        Args:
+            points (list): Route vertices as (lat, lng) pairs, in driving order
+            buffer_m (float): Corridor half-width in meters
+            max_piece_m (float): Longer route segments are subdivided
+            max_pieces (int): Most pieces the route may be split into, or None
+        
+        Raises:
+            ValueError: If the route has fewer than two points or a point is out of range
+            RouteTooLong: If the route needs more than max_pieces pieces
+        """
+        if len(points) < 2:
+            raise ValueError("a route needs at least two points")
+        for lat, lng in points:
+            if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+                raise ValueError("route points must be within -90..90 latitude and -180..180 longitude")
+        
+        # Size the route before splitting it, so an overlong one costs nothing
+        segments = []
+        for (lat1, lng1), (lat2, lng2) in zip(points, points[1:]):
+            length = haversine_m(lat1, lng1, lat2, lng2)
+            segments.append((lat1, lng1, lat2, lng2, length, max(1, math.ceil(length / max_piece_m))))
+        piece_count = sum(segment[5] for segment in segments)
+        if max_pieces is not None and piece_count > max_pieces:
+            raise RouteTooLong(f"route needs {piece_count} pieces of up to {max_piece_m:g} m, more than {max_pieces}")
+        
+        self.buffer_m = buffer_m
+        self.pieces = []
+        along = 0.0
+        for lat1, lng1, lat2, lng2, length, steps in segments:
+            for step in range(steps):
+                start = (lat1 + (lat2 - lat1) * step / steps, lng1 + (lng2 - lng1) * step / steps)
+                end = (lat1 + (lat2 - lat1) * (step + 1) / steps, lng1 + (lng2 - lng1) * (step + 1) / steps)
+                self.pieces.append((start, end, along))
+                along += length / steps
+        self.length_m = along
+
+    def piece_bboxes(self):
+        """Yield (piece index, (south, west, north, east)) for each buffered piece."""
+        for index, ((lat1, lng1), (lat2, lng2), _) in enumerate(self.pieces):
+            south1, west1, north1, east1 = bbox_around(lat1, lng1, self.buffer_m)
+            south2, west2, north2, east2 = bbox_around(lat2, lng2, self.buffer_m)
+            yield index, (min(south1, south2), min(west1, west2), max(north1, north2), max(east1, east2))
+
+    def project(self, index: int, lat: float, lng: float) -> tuple:
+        """
+        Project a point onto one piece of the route.
+
+        Returns:
+            tuple: (distance along the route, distance from the route), in meters
+        """
+        (lat1, lng1), (lat2, lng2), along = self.pieces[index]
+        scale_x = METERS_PER_DEGREE * math.cos(math.radians((lat1 + lat2) / 2))
+        dx = (lng2 - lng1) * scale_x
+        dy = (lat2 - lat1) * METERS_PER_DEGREE
+        px = (lng - lng1) * scale_x
+        py = (lat - lat1) * METERS_PER_DEGREE
+        length_sq = dx * dx + dy * dy
+        t = min(1.0, max(0.0, (px * dx + py * dy) / length_sq)) if length_sq else 0.0
+        offset = math.hypot(px - t * dx, py - t * dy)
+        return along + t * math.sqrt(length_sq), offset
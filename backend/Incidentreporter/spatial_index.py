@@ -0,0 +1,120 @@
+import math
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = 111320.0
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in meters."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """
+    Uniform lat/lng grid over point items.
+
+    Each item lives in exactly one cell, so inserts and removals are O(1) and
+    a radius query only visits the handful of cells overlapping the circle.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.01):
+        """
+        Args:
+            cell_size_deg (float): Cell edge length in degrees (0.01 is ~1.1 km)
+        """
+        self.cell_size_deg = cell_size_deg
+        self._cells = {}
+        self._positions = {}
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, item_id) -> bool:
+        return item_id in self._positions
+
+    def cell_for(self, lat: float, lng: float) -> tuple:
+        """Return the cell key containing the given point."""
+        return (math.floor(lat / self.cell_size_deg), math.floor(lng / self.cell_size_deg))
+
+    def insert(self, item_id, lat: float, lng: float) -> None:
+        """Add an item, moving it if it is already indexed."""
+        if item_id in self._positions:
+            self.remove(item_id)
+        cell = self.cell_for(lat, lng)
+        self._cells.setdefault(cell, {})[item_id] = (lat, lng)
+        self._positions[item_id] = cell
+
+    def remove(self, item_id) -> bool:
+        """Remove an item. Returns False if it was not indexed."""
+        cell = self._positions.pop(item_id, None)
+        if cell is None:
+            return False
+        bucket = self._cells[cell]
+        del bucket[item_id]
+        if not bucket:
+            del self._cells[cell]
+        return True
+
+    def position(self, item_id):
+        """Return the (lat, lng) of an indexed item, or None."""
+        cell = self._positions.get(item_id)
+        if cell is None:
+            return None
+        return self._cells[cell][item_id]
+
+    def cell_range(self, south: float, west: float, north: float, east: float) -> tuple:
+        """Return (min_row, min_col, max_row, max_col) of the cells overlapping a bbox clipped to the world."""
+        min_row, min_col = self.cell_for(max(south, -90.0), max(west, -180.0))
+        max_row, max_col = self.cell_for(min(north, 90.0), min(east, 180.0))
+        return min_row, min_col, max_row, max_col
+
+    def cell_count(self, south: float, west: float, north: float, east: float) -> int:
+        """Return how many cells overlap a bbox, without listing them."""
+        min_row, min_col, max_row, max_col = self.cell_range(south, west, north, east)
+        return max(0, max_row - min_row + 1) * max(0, max_col - min_col + 1)
+
+    def cells_in_bbox(self, south: float, west: float, north: float, east: float):
+        """Yield the keys of all cells overlapping a bounding box."""
+        min_row, min_col, max_row, max_col = self.cell_range(south, west, north, east)
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                yield (row, col)
+
+    def query_bbox(self, south: float, west: float, north: float, east: float):
+        """Yield (item_id, lat, lng) for items inside a bounding box."""
+        if self.cell_count(south, west, north, east) > len(self._cells):
+            # Near the poles a box spans far more cells than hold items, so
+            # scan the occupied cells instead
+            min_row, min_col, max_row, max_col = self.cell_range(south, west, north, east)
+            cells = [(row, col) for row, col in self._cells
+                     if min_row <= row <= max_row and min_col <= col <= max_col]
+        else:
+            cells = self.cells_in_bbox(south, west, north, east)
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if not bucket:
+                continue
+            for item_id, (lat, lng) in bucket.items():
+                if south <= lat <= north and west <= lng <= east:
+                    yield item_id, lat, lng
+
+    def query_radius(self, lat: float, lng: float, radius_m: float):
+        """Yield (item_id, distance_m) for items within radius_m of a point."""
+        south, west, north, east = bbox_around(lat, lng, radius_m)
+        for item_id, item_lat, item_lng in self.query_bbox(south, west, north, east):
+            distance = haversine_m(lat, lng, item_lat, item_lng)
+            if distance <= radius_m:
+                yield item_id, distance
+
+
+def bbox_around(lat: float, lng: float, radius_m: float) -> tuple:
+    """Return the (south, west, north, east) box enclosing a circle, clipped to the world."""
+    dlat = radius_m / METERS_PER_DEGREE
+    dlng = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+    # Near the poles dlng blows up; no box needs more than every longitude
+    return (max(lat - dlat, -90.0), max(lng - dlng, -180.0), min(lat + dlat, 90.0), min(lng + dlng, 180.0))
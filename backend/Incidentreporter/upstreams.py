@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import threading
+
+import httpx
+
+
+class UpstreamError(Exception):
+    """Raised when an upstream call fails, times out or is rejected."""
+
+
+class AsyncUpstreams:
+    """
+    Shared asyncio event loop for upstream I/O.
+
+    Calls to Google and OpenAI run as coroutines on one background loop per
+    process, through a pooled async HTTP client. Each upstream has its own
+    concurrency semaphore and timeout, so a slow upstream queues its own
+    callers instead of tying up connections for the other one. Request
+    threads only park on a future while the call is in flight.
+    """
+
+    def __init__(self, limits: dict, timeouts: dict, pool_size: int = 100):
+        """
+        Args:
+            limits (dict): Maximum concurrent calls per upstream name
+            timeouts (dict): Timeout in seconds per upstream name
+            pool_size (int): Maximum pooled HTTP connections
+        """
+        self.limits = limits
+        self.timeouts = timeouts
+        self.pool_size = pool_size
+        self.logger = logging.getLogger(__name__)
+        self._loop = None
+        self._http = None
+        self._semaphores = {}
+        self._in_flight = {name: 0 for name in limits}
+        self._start_lock = threading.Lock()
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Pooled async HTTP client; only use it from coroutines run by this object."""
+        return self._http
+
+    def start(self) -> None:
+        """Start the event loop thread if it is not running yet."""
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._http = httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=self.pool_size,
+                                        max_keepalive_connections=self.pool_size)
+                )
+                self._semaphores = {name: asyncio.Semaphore(limit) for name, limit in self.limits.items()}
+                ready.set()
+                loop.run_forever()
+
+            threading.Thread(target=run, name='upstream-loop', daemon=True).start()
+            ready.wait()
+            self._loop = loop
+
+    def submit(self, upstream: str, coroutine_factory):
+        """
+        Schedule a call against an upstream.
+
+        Args:
+            upstream (str): Upstream name, used to pick the semaphore and timeout
+            coroutine_factory (callable): Returns the coroutine to run
+
+        Returns:
+            concurrent.futures.Future: Resolves to the coroutine's result
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._guarded(upstream, coroutine_factory), self._loop)
+
+    def call(self, upstream: str, coroutine_factory):
+        """Run a call against an upstream and wait for its result."""
+        return self.submit(upstream, coroutine_factory).result()
+
+    def get_json(self, upstream: str, url: str, params: dict = None) -> dict:
+        """GET a URL through the pooled client and return the decoded JSON body."""
+        async def fetch():
+            response = await self._http.get(url, params=params)
+            response.raise_for_status()
+            return response.json()
+
+        return self.call(upstream, fetch)
+
+    def stats(self) -> dict:
+        """Return in-flight call counts and limits per upstream."""
+        return {
+            name: {
+                'in_flight': self._in_flight.get(name, 0),
+                'limit': limit,
+                'timeout_seconds': self.timeouts.get(name)
+            }
+            for name, limit in self.limits.items()
+        }
+
+    async def _guarded(self, upstream: str, coroutine_factory):
+        timeout = self.timeouts.get(upstream)
+        try:
+            # The timeout covers the wait for a free slot as well as the call
+            return await asyncio.wait_for(self._limited(upstream, coroutine_factory), timeout)
+        except asyncio.TimeoutError:
+            raise UpstreamError(f"{upstream} call timed out after {timeout}s")
+        except httpx.HTTPError as e:
+            raise UpstreamError(f"{upstream} call failed: {e}")
+
+    async def _limited(self, upstream: str, coroutine_factory):
+        semaphore = self._semaphores.get(upstream)
+        if semaphore is None:
+            return await coroutine_factory()
+        async with semaphore:
+            self._in_flight[upstream] = self._in_flight.get(upstream, 0) + 1
+            try:
+                return await coroutine_factory()
+            finally:
+                self._in_flight[upstream] -= 1
@@ -0,0 +1,80 @@
+"""
+Compare two results files written by run_benchmarks.py.
+
+Prints the change in microbenchmark medians and in per-endpoint throughput
+and latency percentiles, and exits with status 1 when any tracked metric
+regressed by more than --threshold (a fraction, default 0.10).
+"""
+import argparse
+import json
+import sys
+
+# (path into the results document, True if higher is better)
+LOAD_METRICS = [
+    (('throughput_rps',), True),
+    (('latency_ms', 'p50'), False),
+    (('latency_ms', 'p99'), False)
+]
+
+
+def lookup(data: dict, path: tuple):
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> tuple:
+    """Return (rows, regressions); each row is (name, before, after, change)."""
+    rows = []
+    regressions = []
+
+    def add(name, before, after, higher_is_better):
+        if before is None or after is None:
+            return
+        change = (after - before) / before if before else 0.0
+        rows.append((name, before, after, change))
+        worse = -change if higher_is_better else change
+        if worse > threshold:
+            regressions.append(name)
+
+    for name, entry in (baseline.get('micro') or {}).items():
+        add(f"micro.{name}.median_us", entry.get('median_us'),
+            lookup(candidate, ('micro', name, 'median_us')), False)
+
+    for endpoint in (lookup(baseline, ('load', 'endpoints')) or {}):
+        for path, higher_is_better in LOAD_METRICS:
+            add(f"load.{endpoint}.{'.'.join(path)}",
+                lookup(baseline, ('load', 'endpoints', endpoint) + path),
+                lookup(candidate, ('load', 'endpoints', endpoint) + path), higher_is_better)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files.')
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative change counted as a regression')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows, regressions = compare(baseline, candidate, args.threshold)
+    width = max((len(row[0]) for row in rows), default=10)
+    print(f"{'metric':<{width}}  {'baseline':>12}  {'candidate':>12}  {'change':>8}")
+    for name, before, after, change in rows:
+        marker = '  <-- regression' if name in regressions else ''
+        print(f"{name:<{width}}  {before:>12.2f}  {after:>12.2f}  {change:>+8.1%}{marker}")
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""
+Local stand-ins for the OpenAI chat completions API and the Google reverse
+geocoding API, with configurable latency and error injection.
+
+Point the app at them with:
+    OPENAI_BASE_URL=http://127.0.0.1:<port>/v1
+    GOOGLE_GEOCODE_URL=http://127.0.0.1:<port>/maps/api/geocode/json
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TYPE_KEYWORDS = [
+    ('accident', ('crash', 'accident', 'collision', 'wreck')),
+    ('speed_trap', ('speed trap', 'radar', 'police')),
+    ('road_closure', ('closed', 'closure')),
+    ('construction', ('construction', 'roadwork', 'work zone')),
+    ('weather_hazard', ('ice', 'fog', 'flood', 'snow')),
+    ('debris', ('debris', 'tire', 'mattress')),
+    ('stalled_vehicle', ('stalled', 'broken down', 'disabled'))
+]
+
+STREETS = ['Interstate 5', 'Main Street', 'Market Avenue', 'Ocean Boulevard', 'Elm Street', 'Highway 101']
+
+class FakeUpstreamConfig:
+    """Latency and error settings shared by all handler threads."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 geocode_latency_ms: float = None, geocode_error_rate: float = None, seed: int = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.geocode_latency_ms = latency_ms if geocode_latency_ms is None else geocode_latency_ms
+        self.geocode_error_rate = error_rate if geocode_error_rate is None else geocode_error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {'chat': 0, 'geocode': 0, 'errors': 0}
+
+    def delay(self, base_ms: float) -> None:
+        with self.lock:
+            jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        time.sleep(max(0.0, base_ms + jitter) / 1000)
+
+    def should_fail(self, rate: float) -> bool:
+        with self.lock:
+            return self.random.random() < rate
+
+
+def classify(message: str) -> dict:
+    """Deterministic stand-in for the model's classification."""
+    text = message.lower()
+    incident_type = next((name for name, words in TYPE_KEYWORDS if any(word in text for word in words)), 'other')
+    severity = 'high' if any(word in text for word in ('major', 'blocked', 'closed', 'injur')) else 'medium'
+    lanes = re.search(r'(\d+)\s*lane', text)
+    direction = next((d for d in ('northbound', 'southbound', 'eastbound', 'westbound') if d in text), None)
+    return {
+        'incident_type': incident_type,
+        'location': message[:80],
+        'severity': severity,
+        'description': f"{incident_type.replace('_', ' ').capitalize()} reported",
+        'time_mentioned': None,
+        'direction': direction,
+        'lanes_affected': int(lanes.group(1)) if lanes else None,
+        'estimated_delay': 15 if severity == 'high' else None
+    }
+
+
+def chat_completion(body: dict) -> dict:
+    """Build a chat.completion response for a classification request."""
+    prompt = body['messages'][-1]['content']
+    if prompt.startswith('Classify each of these traffic incidents:'):
+        descriptions = json.loads(prompt.split('\n', 1)[1])
+        incidents = [dict(classify(text), index=index) for index, text in enumerate(descriptions)]
+        content = json.dumps({'incidents': incidents})
+    else:
+        match = re.search(r"'(.*)'", prompt, re.S)
+        content = json.dumps(classify(match.group(1) if match else prompt))
+
+    prompt_tokens = sum(len(message['content']) for message in body['messages']) // 4
+    completion_tokens = len(content) // 4
+    return {
+        'id': f'chatcmpl-fake-{int(time.time() * 1000)}',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': body.get('model', 'gpt-4o'),
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': content},
+            'finish_reason': 'stop'
+        }],
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+    }
+
+
+def geocode_response(latlng: str) -> dict:
+    """Build a Google reverse-geocoding response for 'lat,lng'."""
+    try:
+        lat, lng = (float(value) for value in latlng.split(','))
+    except ValueError:
+        return {'status': 'INVALID_REQUEST', 'results': []}
+    street = STREETS[int(abs(lat * 1000) + abs(lng * 1000)) % len(STREETS)]
+    number = int(abs(lat * 100000)) % 9000 + 100
+    return {
+        'status': 'OK',
+        'results': [{
+            'formatted_address': f'{number} {street}, Springfield, USA',
+            'address_components': [
+                {'long_name': str(number), 'short_name': str(number), 'types': ['street_number']},
+                {'long_name': street, 'short_name': street, 'types': ['route']},
+                {'long_name': 'Springfield', 'short_name': 'Springfield', 'types': ['locality', 'political']}
+            ],
+            'geometry': {'location': {'lat': lat, 'lng': lng}},
+            'types': ['street_address']
+        }]
+    }
+
+
+def make_handler(config: FakeUpstreamConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            if urlparse(self.path).path.rstrip('/') != '/v1/chat/completions':
+                return self._send(404, {'error': {'message': 'not found'}})
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+            config.delay(config.latency_ms)
+            with config.lock:
+                config.counts['chat'] += 1
+            if config.should_fail(config.error_rate):
+                with config.lock:
+                    config.counts['errors'] += 1
+                return self._send(500, {'error': {'message': 'injected failure', 'type': 'server_error'}})
+            self._send(200, chat_completion(body))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/stats':
+                with config.lock:
+                    return self._send(200, dict(config.counts))
+            if url.path != '/maps/api/geocode/json':
+                return self._send(404, {'status': 'NOT_FOUND'})
+            config.delay(config.geocode_latency_ms)
+            with config.lock:
+                config.counts['geocode'] += 1
+            if config.should_fail(config.geocode_error_rate):
+                with config.lock:
+                    config.counts['errors'] += 1
+                return self._send(500, {'status': 'UNKNOWN_ERROR', 'results': []})
+            latlng = parse_qs(url.query).get('latlng', [''])[0]
+            self._send(200, geocode_response(latlng))
+
+        def _send(self, status: int, payload: dict) -> None:
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def start_server(config: FakeUpstreamConfig, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """Start the fake upstreams on a background thread and return the server."""
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='fake-upstreams', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run fake OpenAI and Google geocoding servers.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency-ms', type=float, default=300.0, help='Injected OpenAI latency')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Uniform +/- jitter on every response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of OpenAI calls that fail with 500')
+    parser.add_argument('--geocode-latency-ms', type=float, default=80.0)
+    parser.add_argument('--geocode-error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    config = FakeUpstreamConfig(args.latency_ms, args.jitter_ms, args.error_rate,
+                                args.geocode_latency_ms, args.geocode_error_rate, args.seed)
+    server = start_server(config, args.host, args.port)
+    print(f"Fake upstreams listening on http://{args.host}:{server.server_address[1]}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+Closed-loop load generator for a running DriveMind server.
+
+Each worker thread picks an endpoint from the configured mix, sends one
+request, waits for the response and repeats until the duration runs out.
+Reports throughput, latency percentiles and errors per endpoint as JSON.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+import requests
+
+CONFIDENT_MESSAGES = [
+    "Major crash on I-5 northbound, 2 lanes blocked",
+    "Speed trap on Main Street near the school",
+    "Road closed at Market Avenue due to flooding",
+    "Stalled vehicle in the right lane on Highway 101 southbound"
+]
+
+AMBIGUOUS_MESSAGES = [
+    "Something weird going on near the mall",
+    "Lots of flashing lights up ahead, not sure what happened",
+    "Traffic is really slow by the stadium",
+    "People stopped on the bridge looking at something"
+]
+
+SMART_TYPES = ['accident', 'speed_trap', 'debris', 'construction', 'stalled_vehicle']
+
+DEFAULT_MIX = {'report': 4, 'smart-report': 2, 'geocode': 4}
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class EndpointStats:
+    """Latencies and outcome counts for one endpoint."""
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+
+    def record(self, seconds: float, status) -> None:
+        self.latencies.append(seconds)
+        self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+        if status == 'error' or int(status) >= 500:
+            self.errors += 1
+
+    def summary(self, duration: float) -> dict:
+        latencies = sorted(self.latencies)
+        ms = lambda value: None if value is None else round(value * 1000, 2)
+        return {
+            'requests': len(latencies),
+            'throughput_rps': round(len(latencies) / duration, 2) if duration else None,
+            'errors': self.errors,
+            'statuses': self.statuses,
+            'latency_ms': {
+                'min': ms(latencies[0] if latencies else None),
+                'p50': ms(percentile(latencies, 0.50)),
+                'p90': ms(percentile(latencies, 0.90)),
+                'p99': ms(percentile(latencies, 0.99)),
+                'max': ms(latencies[-1] if latencies else None),
+                'mean': ms(sum(latencies) / len(latencies) if latencies else None)
+            }
+        }
+
+
+def random_point(rng: random.Random, center: tuple, spread_deg: float) -> dict:
+    return {
+        'lat': round(center[0] + rng.uniform(-spread_deg, spread_deg), 6),
+        'lng': round(center[1] + rng.uniform(-spread_deg, spread_deg), 6)
+    }
+
+
+def build_request(endpoint: str, rng: random.Random, args) -> tuple:
+    """Return (path, json body) for one request to the endpoint."""
+    point = random_point(rng, (args.center_lat, args.center_lng), args.spread_deg)
+    if endpoint == 'report':
+        pool = AMBIGUOUS_MESSAGES if rng.random() < args.ambiguous_ratio else CONFIDENT_MESSAGES
+        return '/report', {'message': rng.choice(pool), 'coordinates': point}
+    if endpoint == 'smart-report':
+        return '/smart-report', {
+            'incident_type': rng.choice(SMART_TYPES),
+            'coordinates': point,
+            'road_info': {'road_type': 'street', 'typical_lanes': 2},
+            'address': f"{rng.randint(100, 9999)} Main Street"
+        }
+    if endpoint == 'geocode':
+        return '/geocode', point
+    raise ValueError(f"unknown endpoint: {endpoint}")
+
+
+def worker(index: int, args, mix: list, stats: dict, deadline: float) -> None:
+    rng = random.Random(None if args.seed is None else args.seed + index)
+    session = requests.Session()
+    # Spread workers over distinct client addresses so per-client rate limits
+    # measure the service rather than one hot bucket (needs TRUST_PROXY_HEADERS)
+    headers = {'X-Forwarded-For': f"10.0.{index // 250}.{index % 250 + 1}"}
+    names, weights = zip(*mix)
+    while time.monotonic() < deadline:
+        endpoint = rng.choices(names, weights)[0]
+        path, body = build_request(endpoint, rng, args)
+        started = time.perf_counter()
+        try:
+            response = session.post(args.base_url + path, json=body, headers=headers, timeout=args.timeout)
+            status = response.status_code
+        except requests.RequestException:
+            status = 'error'
+        stats[endpoint].record(time.perf_counter() - started, status)
+
+
+def run(args) -> dict:
+    """Drive the server for args.duration seconds and return the summary."""
+    mix = [(name, weight) for name, weight in args.mix.items() if weight > 0]
+    stats = {name: EndpointStats() for name, _ in mix}
+    deadline = time.monotonic() + args.duration
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i, args, mix, stats, deadline), daemon=True)
+               for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(s.latencies) for s in stats.values())
+    return {
+        'duration_s': round(elapsed, 3),
+        'concurrency': args.concurrency,
+        'total_requests': total,
+        'throughput_rps': round(total / elapsed, 2),
+        'endpoints': {name: s.summary(elapsed) for name, s in stats.items()}
+    }
+
+
+def parse_mix(value: str) -> dict:
+    """Parse 'report=4,geocode=1' into {'report': 4, 'geocode': 1}."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown endpoint: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Load-test a running DriveMind server.')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent client threads')
+    parser.add_argument('--mix', type=parse_mix, default=dict(DEFAULT_MIX),
+                        help='Endpoint weights, e.g. report=4,smart-report=2,geocode=4')
+    parser.add_argument('--ambiguous-ratio', type=float, default=0.3,
+                        help='Fraction of /report messages the keyword classifier should not be sure of')
+    parser.add_argument('--center-lat', type=float, default=47.6062)
+    parser.add_argument('--center-lng', type=float, default=-122.3321)
+    parser.add_argument('--spread-deg', type=float, default=0.2,
+                        help='Coordinates are drawn uniformly within this many degrees of the center')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', help='Write results to this JSON file instead of stdout')
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    results = run(args)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
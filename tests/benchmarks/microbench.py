@@ -0,0 +1,114 @@
+"""
+Microbenchmarks for the report-building hot paths in app.py.
+
+Imports the Flask app in-process with throwaway storage, then times
+create_basic_report, extract_road_info and create_structured_report with
+timeit. Prints (or writes) a JSON document of per-call timings.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import timeit
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'backend', 'Incidentreporter')
+
+BASIC_MESSAGES = [
+    "Major crash on I-5 northbound, 2 lanes blocked",
+    "Speed trap on Main Street near the school",
+    "Debris in the left lane on Highway 101 southbound",
+    "Something weird going on near the mall",
+    "Road closed at Market Avenue due to water main break"
+]
+
+GEOCODE_RESULTS = [
+    {'address_components': [
+        {'long_name': '1200', 'types': ['street_number']},
+        {'long_name': 'Interstate 5', 'types': ['route']},
+        {'long_name': 'Seattle', 'types': ['locality', 'political']}
+    ]},
+    {'address_components': [
+        {'long_name': 'Ocean Boulevard', 'types': ['route']},
+        {'long_name': 'Ocean Boulevard & 3rd Street', 'types': ['intersection']}
+    ]},
+    {'address_components': [
+        {'long_name': '42', 'types': ['street_number']},
+        {'long_name': 'Elm Street', 'types': ['route']}
+    ]}
+]
+
+STRUCTURED_FORMS = [
+    {'incident_type': 'accident', 'location': 'I-5 at exit 164', 'severity': 'high',
+     'description': 'Two cars, right shoulder', 'direction': 'northbound', 'lanes_affected': 2,
+     'estimated_delay': 20, 'coordinates': {'lat': 47.61, 'lng': -122.33}},
+    {'incident_type': 'debris', 'location': 'Main Street', 'severity': 'low',
+     'description': '', 'direction': '', 'lanes_affected': None}
+]
+
+
+def load_app():
+    """Import app.py with dummy credentials and temporary storage."""
+    scratch = tempfile.mkdtemp(prefix='drivemind-bench-')
+    os.environ.setdefault('OPENAI_API_KEY', 'bench-dummy-key')
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(scratch, 'bench.db')}")
+    os.environ.setdefault('INGEST_LOG_DIR', os.path.join(scratch, 'ingest_log'))
+    sys.path.insert(0, os.path.abspath(APP_DIR))
+    import app
+    logging.disable(logging.CRITICAL)
+    return app
+
+
+def bench(func, inputs, number, repeat) -> dict:
+    """Time func over inputs, cycling through them; return per-call statistics."""
+    count = len(inputs)
+    state = {'i': 0}
+
+    def call():
+        func(inputs[state['i'] % count])
+        state['i'] += 1
+
+    runs = [seconds / number for seconds in timeit.repeat(call, number=number, repeat=repeat)]
+    return {
+        'calls_per_run': number,
+        'runs': repeat,
+        'best_us': round(min(runs) * 1e6, 3),
+        'median_us': round(statistics.median(runs) * 1e6, 3),
+        'mean_us': round(statistics.fmean(runs) * 1e6, 3),
+        'stdev_us': round(statistics.pstdev(runs) * 1e6, 3)
+    }
+
+
+def run(number: int = 2000, repeat: int = 7) -> dict:
+    """Run all microbenchmarks and return their results keyed by name."""
+    app = load_app()
+    return {
+        'create_basic_report': bench(app.create_basic_report, BASIC_MESSAGES, number, repeat),
+        'extract_road_info': bench(app.extract_road_info, GEOCODE_RESULTS, number, repeat),
+        'create_structured_report': bench(app.create_structured_report, STRUCTURED_FORMS, number, repeat)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmark report-building functions.')
+    parser.add_argument('--number', type=int, default=2000, help='Calls per timing run')
+    parser.add_argument('--repeat', type=int, default=7, help='Number of timing runs')
+    parser.add_argument('--output', help='Write results to this JSON file instead of stdout')
+    args = parser.parse_args()
+
+    results = run(args.number, args.repeat)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    sys.stdout.flush()
+    # Skip app.py's atexit hooks; the scratch storage is thrown away
+    os._exit(0)
+
+
+if __name__ == '__main__':
+    main()
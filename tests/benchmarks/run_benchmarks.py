@@ -0,0 +1,184 @@
+"""
+Run the full benchmark suite offline and write one comparable results file.
+
+Starts the fake OpenAI/Google upstreams in-process, launches the app as a
+subprocess pointed at them, runs the microbenchmarks and the load
+generator, and writes a JSON document tagged with the git commit and the
+configuration used.
+
+Example:
+    python tests/benchmarks/run_benchmarks.py --duration 30 --concurrency 32 \
+        --openai-latency-ms 400 --error-rate 0.02 --output results/$(git rev-parse --short HEAD).json
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+import fake_upstreams
+import loadgen
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(BENCH_DIR, '..', '..'))
+APP_DIR = os.path.join(REPO_ROOT, 'backend', 'Incidentreporter')
+
+# Every rate-limited endpoint gets a bucket large enough never to throttle
+UNLIMITED = [1e9, 1e9]
+RATE_LIMITED_ENDPOINTS = ['report_incident', 'report_batch', 'geocode_location', 'geocode_bulk',
+                          'position_update', 'quick_report_submit', 'smart_report']
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def app_environment(args, upstream_url: str, scratch: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        'OPENAI_API_KEY': 'bench-dummy-key',
+        'OPENAI_BASE_URL': f"{upstream_url}/v1",
+        'GOOGLE_MAPS_API_KEY': 'bench-dummy-key',
+        'GOOGLE_GEOCODE_URL': f"{upstream_url}/maps/api/geocode/json",
+        'DATABASE_URL': f"sqlite:///{os.path.join(scratch, 'bench.db')}",
+        'INGEST_LOG_DIR': os.path.join(scratch, 'ingest_log'),
+        'RATE_LIMITS': json.dumps({endpoint: UNLIMITED for endpoint in RATE_LIMITED_ENDPOINTS}),
+        'TRUST_PROXY_HEADERS': 'true',
+        'SERVING_MODE': args.serving_mode,
+        'PYTHONPATH': APP_DIR
+    })
+    for assignment in args.env:
+        name, _, value = assignment.partition('=')
+        env[name] = value
+    return env
+
+
+def start_app(args, env: dict, log_path: str) -> subprocess.Popen:
+    """Launch the app on args.port with the Flask threaded server or gunicorn."""
+    if args.server == 'gunicorn':
+        env['BIND'] = f"127.0.0.1:{args.port}"
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'main:app']
+    else:
+        command = [sys.executable, '-c',
+                   'import logging; from app import app; logging.disable(logging.CRITICAL); '
+                   f"app.run(host='127.0.0.1', port={args.port}, threaded=True)"]
+    log = open(log_path, 'w')
+    return subprocess.Popen(command, cwd=APP_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_healthy(base_url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"app exited with status {process.returncode} during startup")
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"app did not become healthy within {timeout}s")
+
+
+def run_microbench(args) -> dict:
+    output = subprocess.check_output(
+        [sys.executable, os.path.join(BENCH_DIR, 'microbench.py'),
+         '--number', str(args.micro_number), '--repeat', str(args.micro_repeat)],
+        text=True, stderr=subprocess.DEVNULL)
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run DriveMind benchmarks against fake upstreams.')
+    parser.add_argument('--duration', type=float, default=30.0, help='Load test length in seconds')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--mix', type=loadgen.parse_mix, default=dict(loadgen.DEFAULT_MIX))
+    parser.add_argument('--ambiguous-ratio', type=float, default=0.3)
+    parser.add_argument('--openai-latency-ms', type=float, default=300.0)
+    parser.add_argument('--geocode-latency-ms', type=float, default=80.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='OpenAI failure rate')
+    parser.add_argument('--geocode-error-rate', type=float, default=0.0)
+    parser.add_argument('--server', choices=['flask', 'gunicorn'], default='flask')
+    parser.add_argument('--serving-mode', choices=['sync', 'async'], default='sync')
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('--env', action='append', default=[], metavar='NAME=VALUE',
+                        help='Extra environment for the app process (repeatable)')
+    parser.add_argument('--micro-number', type=int, default=2000)
+    parser.add_argument('--micro-repeat', type=int, default=7)
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--skip-load', action='store_true')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='benchmark-results.json')
+    args = parser.parse_args()
+    args.port = args.port or free_port()
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'config': {key: value for key, value in vars(args).items() if key != 'output'}
+        }
+    }
+
+    if not args.skip_micro:
+        print('Running microbenchmarks...', file=sys.stderr)
+        results['micro'] = run_microbench(args)
+
+    if not args.skip_load:
+        upstream_config = fake_upstreams.FakeUpstreamConfig(
+            args.openai_latency_ms, args.jitter_ms, args.error_rate,
+            args.geocode_latency_ms, args.geocode_error_rate, args.seed)
+        upstream = fake_upstreams.start_server(upstream_config)
+        upstream_url = f"http://127.0.0.1:{upstream.server_address[1]}"
+        scratch = tempfile.mkdtemp(prefix='drivemind-bench-')
+        base_url = f"http://127.0.0.1:{args.port}"
+        process = start_app(args, app_environment(args, upstream_url, scratch), os.path.join(scratch, 'app.log'))
+        try:
+            wait_healthy(base_url, process, timeout=60)
+            print(f"Load testing {base_url} for {args.duration}s...", file=sys.stderr)
+            load_args = loadgen.build_parser().parse_args([])
+            load_args.base_url = base_url
+            for name in ('duration', 'concurrency', 'mix', 'ambiguous_ratio', 'seed'):
+                setattr(load_args, name, getattr(args, name))
+            results['load'] = loadgen.run(load_args)
+            results['load']['upstream_calls'] = dict(upstream_config.counts)
+            try:
+                results['load']['server_stats'] = requests.get(f"{base_url}/stats", timeout=5).json()
+            except (requests.RequestException, ValueError):
+                results['load']['server_stats'] = None
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            upstream.shutdown()
+        print(f"App log: {os.path.join(scratch, 'app.log')}", file=sys.stderr)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+        f.write('\n')
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The backend modules import each other by plain name, as they do when run
+# from backend/Incidentreporter
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend', 'Incidentreporter'))
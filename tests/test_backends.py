@@ -0,0 +1,45 @@
+import threading
+
+from backends import BackendRegistry
+
+
+def test_peek_or_warm_builds_once_in_the_background():
+    release = threading.Event()
+    builds = []
+
+    def factory():
+        builds.append(1)
+        release.wait(5)
+        return object()
+
+    registry = BackendRegistry()
+    backend = registry.register('slow', factory)
+
+    # Callers get None straight away while one background build runs
+    assert registry.peek_or_warm('slow') is None
+    assert registry.peek_or_warm('slow') is None
+    assert not backend.warm()
+
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == 'slow-warmup':
+            thread.join(5)
+
+    assert registry.peek_or_warm('slow') is not None
+    assert len(builds) == 1
+
+
+def test_failed_warm_up_leaves_backend_unavailable():
+    def factory():
+        raise RuntimeError('no credentials')
+
+    registry = BackendRegistry()
+    backend = registry.register('broken', factory, retry_seconds=60)
+
+    assert backend.warm()
+    for thread in threading.enumerate():
+        if thread.name == 'broken-warmup':
+            thread.join(5)
+
+    assert registry.peek_or_warm('broken') is None
+    assert backend.stats()['error'] == 'no credentials'
@@ -0,0 +1,20 @@
+import time
+
+from geocode_cache import PrewarmIndex
+
+
+def test_nearest_returns_result_within_distance():
+    index = PrewarmIndex(max_distance_m=150)
+    index.put(47.6, -122.3, 'seattle')
+
+    assert index.nearest(47.6005, -122.3) == 'seattle'
+    assert index.nearest(47.61, -122.3) is None
+
+
+def test_nearest_at_the_pole_does_not_walk_every_ring():
+    index = PrewarmIndex(max_distance_m=150)
+    index.put(89.9995, 40.0, 'pole')
+
+    started = time.perf_counter()
+    assert index.nearest(90.0, 0.0) == 'pole'
+    assert time.perf_counter() - started < 0.5
@@ -0,0 +1,73 @@
+import random
+import tracemalloc
+
+from heatmap_tiles import HeatmapTiles, mercator_fraction
+
+TYPES = ['accident', 'speed_trap', 'road_closure', 'construction', 'weather_hazard', 'debris',
+         'stalled_vehicle', 'other']
+NOW = 1_000_000.0
+
+
+def random_reports(count, seed=1):
+    rng = random.Random(seed)
+    return [(rng.uniform(47.0, 48.0), rng.uniform(-123.0, -122.0), rng.choice(TYPES), NOW - rng.uniform(0, 250))
+            for _ in range(count)]
+
+
+def tile_of(lat, lng, z):
+    fx, fy = mercator_fraction(lat, lng)
+    return int(fx * 2 ** z), int(fy * 2 ** z)
+
+
+def test_memory_grows_with_occupied_cells_not_tiles():
+    tracemalloc.start()
+    try:
+        tiles = HeatmapTiles(TYPES)
+        for report in random_reports(5000):
+            tiles.add(*report, NOW)
+        used, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    stats = tiles.stats()
+    assert stats['added'] == 5000
+    # Dense per-tile arrays took hundreds of MB for the same reports
+    assert used < 20 * 1024 * 1024
+    assert stats['cells'] <= 5000 * (tiles.max_zoom - tiles.min_zoom + 1) * 2
+
+
+def test_cell_cap_drops_oldest_buckets():
+    tiles = HeatmapTiles(TYPES, bucket_seconds=60, max_cells=2000)
+    rng = random.Random(2)
+    for minute in range(10):
+        for _ in range(200):
+            tiles.add(rng.uniform(47.0, 48.0), rng.uniform(-123.0, -122.0), 'accident',
+                      NOW + minute * 60, NOW + minute * 60)
+        assert tiles.stats()['cells'] < 2000 + 2 * (tiles.max_zoom - tiles.min_zoom + 1)
+
+    stats = tiles.stats()
+    assert stats['evicted_buckets'] > 0
+    # The newest minute is still counted
+    assert stats['buckets'] >= 1
+
+
+def test_tile_counts_and_expiry():
+    tiles = HeatmapTiles(TYPES, bucket_seconds=300, buckets=12)
+    lat, lng = 47.6, -122.3
+    tiles.add(lat, lng, 'accident', NOW - 3000, NOW)
+    tiles.add(lat, lng, 'accident', NOW, NOW)
+    tiles.add(lat, lng, 'debris', NOW, NOW)
+
+    x, y = tile_of(lat, lng, 14)
+    summary = tiles.tile(14, x, y, NOW)
+    assert summary['total'] == 3
+    assert summary['by_type'] == {'accident': 2, 'debris': 1}
+    assert len(summary['cells']) == 1
+    assert tiles.tile(14, x, y, NOW, incident_type='debris')['total'] == 1
+    assert tiles.tile(14, x, y, NOW, window_buckets=1)['total'] == 2
+
+    # Once the window has passed every count is gone
+    assert tiles.tile(14, x, y, NOW + 3600)['total'] == 0
+    stats = tiles.stats()
+    assert stats['cells'] == 0
+    assert stats['tiles'] == 0
@@ -0,0 +1,51 @@
+import pytest
+
+from incident_columns import ColumnarIncidents, IncidentRecord
+
+REPORTS = [
+    {
+        'id': 'a1', 'incident_type': 'accident', 'severity': 'high', 'location': 'I-5 at exit 164',
+        'description': 'Two cars', 'direction': 'northbound', 'lanes_affected': 2, 'confidence': 0.9,
+        'coordinates': {'lat': 47.6062095, 'lng': -122.3320708},
+        'road_info': {'road_type': 'highway', 'is_highway': True, 'typical_lanes': 4},
+        'reported_at': '2024-05-01T12:00:00.123456Z', 'expires_at': '2024-05-01T14:00:00Z',
+        'confirmations': 1, 'processing_method': 'basic_keyword_detection', 'status': 'active'
+    },
+    {
+        'id': 'b2', 'incident_type': 'debris', 'severity': None, 'location': None,
+        'coordinates': {'lat': -33.868820123456, 'lng': 151.209295987654},
+        'reported_at': '2024-05-01T12:00:00Z', 'custom_field': [1, 2]
+    },
+    {
+        'id': 'c3', 'incident_type': 'other', 'coordinates': {'lat': 0.1 + 0.2, 'lng': -179.99999999}
+    }
+]
+
+
+@pytest.mark.parametrize('report', REPORTS, ids=[report['id'] for report in REPORTS])
+def test_record_round_trip(report):
+    assert IncidentRecord.from_report(report).to_report() == report
+
+
+@pytest.mark.parametrize('report', REPORTS, ids=[report['id'] for report in REPORTS])
+def test_columnar_round_trip_keeps_exact_coordinates(report):
+    table = ColumnarIncidents(capacity=1)
+    table.put(IncidentRecord.from_report(report), timestamp=0.0)
+
+    stored = table.get(report['id']).to_report()
+
+    assert stored == report
+    assert stored['coordinates']['lng'] == report['coordinates']['lng']
+
+
+def test_bbox_filter_uses_exact_coordinates_at_the_edge():
+    table = ColumnarIncidents()
+    inside = {'id': 'in', 'coordinates': {'lat': 47.6, 'lng': -122.3320708}}
+    # Rounds to the same float32 as the edge, but lies just outside it
+    outside = {'id': 'out', 'coordinates': {'lat': 47.6, 'lng': -122.3320709}}
+    for report in (inside, outside):
+        table.put(IncidentRecord.from_report(report), timestamp=0.0)
+
+    rows = table.rows(47.5, -122.3320708, 47.7, -122.3)
+
+    assert [table.record(row).id for row in rows.tolist()] == ['in']
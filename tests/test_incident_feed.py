@@ -0,0 +1,34 @@
+import time
+
+from incident_feed import IncidentFeed
+
+
+def test_world_bbox_subscription_is_kept_wide_without_listing_cells():
+    feed = IncidentFeed(cell_size_deg=0.05, max_cells=400)
+
+    started = time.perf_counter()
+    subscription = feed.subscribe_bbox(-90, -180, 90, 180)
+
+    assert time.perf_counter() - started < 0.5
+    assert subscription.cells == []
+    assert feed.stats()['wide_subscriptions'] == 1
+    assert feed.publish({'id': 'a', 'coordinates': {'lat': 47.6, 'lng': -122.3}}) == 1
+
+
+def test_small_bbox_subscription_is_indexed_by_cell():
+    feed = IncidentFeed(cell_size_deg=0.05, max_cells=400)
+    subscription = feed.subscribe_bbox(47.5, -122.4, 47.7, -122.2)
+
+    assert subscription.cells
+    assert feed.stats()['wide_subscriptions'] == 0
+    assert feed.publish({'id': 'a', 'coordinates': {'lat': 47.6, 'lng': -122.3}}) == 1
+    assert feed.publish({'id': 'b', 'coordinates': {'lat': 40.0, 'lng': -122.3}}) == 0
+
+
+def test_radius_subscription_at_the_pole_is_clipped_to_the_world():
+    feed = IncidentFeed(cell_size_deg=0.05, max_cells=400)
+    subscription = feed.subscribe_radius(90.0, 0.0, 50000)
+
+    south, west, north, east = subscription.bbox
+    assert (west, north, east) == (-180.0, 90.0, 180.0)
+    assert feed.publish({'id': 'a', 'coordinates': {'lat': 89.9, 'lng': 120.0}}) == 1
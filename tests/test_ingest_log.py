@@ -0,0 +1,185 @@
+import fcntl
+import json
+import os
+
+import pytest
+
+from ingest_log import IngestLog
+
+
+class RecordingWriter:
+    """Writer that stores every batch, failing while fail is set or on a 'bad' record."""
+
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    def __call__(self, records):
+        if self.fail:
+            raise ConnectionError('database is down')
+        if any(record.get('bad') for record in records):
+            raise ValueError('rejected by the database')
+        self.batches.append(records)
+
+    @property
+    def records(self):
+        return [record for batch in self.batches for record in batch]
+
+
+@pytest.fixture
+def writer():
+    return RecordingWriter()
+
+
+@pytest.fixture
+def log(tmp_path, writer):
+    log = IngestLog(str(tmp_path), writer, flush_interval=60, fsync=False)
+    yield log
+    writer.fail = False
+    log.close()
+
+
+def segment_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith('.log'))
+
+
+def test_flush_hands_records_to_writer_and_removes_segment(tmp_path, log, writer):
+    log.append_many([{'id': 'a', 'n': 1}, {'id': 'b', 'n': 1}, {'id': 'a', 'n': 2}])
+
+    assert log.flush() == 3
+
+    # Only the latest version of each id is written
+    assert writer.records == [{'id': 'a', 'n': 2}, {'id': 'b', 'n': 1}]
+    assert segment_files(tmp_path) == [os.path.basename(log._segment)]
+
+
+def test_write_many_positions_increase_and_wait_returns(log):
+    first = log.write_many([{'id': 'a'}])
+    second = log.write_many([{'id': 'b'}])
+
+    assert second > first
+    log.wait(second)
+    assert log.stats()['backlog'] == 2
+
+
+def test_failed_flush_requeues_records(tmp_path, log, writer):
+    log.append_many([{'id': 'a', 'n': 1}])
+    writer.fail = True
+
+    with pytest.raises(ConnectionError):
+        log.flush()
+
+    stats = log.stats()
+    assert stats['backlog'] == 1
+    assert stats['flush_failures'] == 1
+    assert writer.records == []
+
+    log.append_many([{'id': 'a', 'n': 2}])
+    writer.fail = False
+    assert log.flush() == 2
+    assert writer.records == [{'id': 'a', 'n': 2}]
+    # The sealed segment was kept through the failure and deleted after it
+    assert len(segment_files(tmp_path)) == 1
+
+
+def test_rejected_record_is_set_aside_and_the_rest_written(tmp_path, log, writer):
+    log.append_many([{'id': 'a'}, {'id': 'b', 'bad': True}, {'id': 'c'}])
+
+    assert log.flush() == 3
+
+    assert writer.records == [{'id': 'a'}, {'id': 'c'}]
+    assert log.stats()['rejected'] == 1
+    assert log.stats()['backlog'] == 0
+    rejected = (tmp_path / 'rejected.jsonl').read_text().splitlines()
+    assert [json.loads(line) for line in rejected] == [{'id': 'b', 'bad': True}]
+
+    # The log keeps flowing after the bad record
+    log.append_many([{'id': 'd'}])
+    assert log.flush() == 1
+    assert writer.records[-1] == {'id': 'd'}
+
+
+def test_replay_sets_aside_rejected_records_instead_of_raising(tmp_path, writer):
+    leftover = tmp_path / '000000000000001-1-000001.log'
+    leftover.write_text(json.dumps({'id': 'a', 'bad': True}) + '\n' + json.dumps({'id': 'b'}) + '\n')
+
+    log = IngestLog(str(tmp_path), writer, flush_interval=60, fsync=False)
+    try:
+        assert log.replay() == 2
+    finally:
+        log.close()
+
+    assert writer.records == [{'id': 'b'}]
+    assert log.stats()['rejected'] == 1
+    assert not leftover.exists()
+
+
+def test_replay_keeps_segments_while_the_store_is_down(tmp_path, writer):
+    leftover = tmp_path / '000000000000001-1-000001.log'
+    leftover.write_text(json.dumps({'id': 'a'}) + '\n')
+    writer.fail = True
+
+    log = IngestLog(str(tmp_path), writer, flush_interval=60, fsync=False)
+    try:
+        assert log.replay() == 0
+    finally:
+        writer.fail = False
+        log.close()
+
+    assert leftover.exists()
+    assert log.stats()['rejected'] == 0
+
+
+def test_replay_reads_left_over_segments_and_ignores_torn_line(tmp_path, writer):
+    leftover = tmp_path / '000000000000001-1-000001.log'
+    lines = [json.dumps({'id': 'a', 'n': 1}), json.dumps({'id': 'b', 'n': 1}), json.dumps({'id': 'a', 'n': 2})]
+    leftover.write_text('\n'.join(lines) + '\n{"id": "c", "n"')
+
+    log = IngestLog(str(tmp_path), writer, flush_interval=60, fsync=False)
+    try:
+        assert log.replay() == 3
+    finally:
+        log.close()
+
+    assert writer.records == [{'id': 'a', 'n': 2}, {'id': 'b', 'n': 1}]
+    assert not leftover.exists()
+
+
+def test_replay_skips_segments_owned_by_a_live_process(tmp_path, log, writer):
+    owned = tmp_path / '000000000000001-1-000001.log'
+    owned.write_text(json.dumps({'id': 'a'}) + '\n')
+
+    with open(owned) as f:
+        # Another worker holds its segment locked while it is alive
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        assert log.replay() == 0
+
+    assert writer.records == []
+    assert owned.exists()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_forked_child_gets_its_own_segment_and_flusher(tmp_path, log, writer):
+    log.append_many([{'id': 'parent'}])
+    parent_segment = log._segment
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            ok = (log._segment != parent_segment
+                  and log._thread.is_alive()
+                  and log.stats()['backlog'] == 0)
+            log.append_many([{'id': 'child'}])
+            ok = ok and log.flush() == 1 and writer.records == [{'id': 'child'}]
+            ok = ok and os.path.exists(parent_segment)
+        except Exception:
+            ok = False
+        os._exit(0 if ok else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+
+    # The parent's lock was released after the fork and its records are intact
+    log.append_many([{'id': 'parent-2'}])
+    assert log.flush() == 2
+    assert [record['id'] for record in writer.records] == ['parent', 'parent-2']
@@ -0,0 +1,80 @@
+import random
+import re
+
+from keyword_classifier import (DIRECTION_KEYWORDS, INCIDENT_TYPE_KEYWORDS, SEVERITY_KEYWORDS,
+                                classify_message)
+
+
+def reference_classify(message):
+    """The per-keyword substring loop the single-pass classifier replaced."""
+    message_lower = message.lower()
+
+    def first(table, default):
+        for value, keywords in table:
+            if any(word in message_lower for word in keywords):
+                return value
+        return default
+
+    lanes_match = re.search(r'(\d+)\s*lane', message_lower)
+    return {
+        'incident_type': first(INCIDENT_TYPE_KEYWORDS, 'other'),
+        'severity': first(SEVERITY_KEYWORDS, 'medium'),
+        'direction': first(DIRECTION_KEYWORDS, None),
+        'lanes_affected': int(lanes_match.group(1)) if lanes_match else None
+    }
+
+
+KEYWORDS = [keyword for table in (INCIDENT_TYPE_KEYWORDS, SEVERITY_KEYWORDS, DIRECTION_KEYWORDS)
+            for _, keywords in table for keyword in keywords]
+
+MESSAGES = [
+    'Major crash on I-5 northbound, 2 lanes blocked',
+    'minor fender bender westbound near exit 12',
+    'Police radar trap on Main Street southbound',
+    'Road work ahead, work zone on Highway 101 eastbound',
+    'Stalled truck in the left lane, 1 lane closed',
+    'Debris / object in road near the bridge',
+    'Heavy traffic, major delays after the collision',
+    'CRASH CLEARED, traffic light',
+    'nothing to report here',
+    'minorthe',
+    'crasheavy traffic',
+    'laneast of the exit, 3 lanes',
+    'northbound and southbound both closed',
+    'wrecked car 12  lanes',
+    'copolice',
+]
+
+
+def fuzz_corpus(count=3000, seed=4):
+    """Messages stitched from keywords, keyword fragments and filler, overlapping at the seams."""
+    rng = random.Random(seed)
+    fillers = ['', ' ', 'the', 'on ', 'i-5', '2 ', '12 lane', 'lane', 'x', ' near ']
+    corpus = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(1, 4)):
+            keyword = rng.choice(KEYWORDS)
+            cut = rng.randint(0, 2)
+            # Trim or keep keywords whole so they run into one another
+            parts.append(keyword[cut:] if rng.random() < 0.3 else keyword)
+            parts.append(rng.choice(fillers))
+        corpus.append(''.join(parts))
+    return corpus
+
+
+def test_matches_the_substring_loop_on_fixed_messages():
+    for message in MESSAGES:
+        result = classify_message(message)
+        expected = reference_classify(message)
+        assert {field: result[field] for field in expected} == expected, message
+
+
+def test_matches_the_substring_loop_on_overlapping_keywords():
+    mismatches = []
+    for message in fuzz_corpus():
+        result = classify_message(message)
+        expected = reference_classify(message)
+        if {field: result[field] for field in expected} != expected:
+            mismatches.append(message)
+    assert mismatches == []
@@ -0,0 +1,23 @@
+import pytest
+
+from route_corridor import RouteCorridor, RouteTooLong
+
+
+def test_long_segments_are_split_into_pieces():
+    # About 2.2 km due north
+    corridor = RouteCorridor([(47.6, -122.3), (47.62, -122.3)], buffer_m=100)
+
+    assert len(corridor.pieces) == 3
+    assert 2200 < corridor.length_m < 2250
+
+
+def test_route_over_the_piece_cap_is_rejected_before_splitting():
+    zigzag = [(80.0, 170.0) if i % 2 else (-80.0, -170.0) for i in range(100)]
+
+    with pytest.raises(RouteTooLong):
+        RouteCorridor(zigzag, buffer_m=100, max_pieces=20000)
+
+
+def test_points_outside_the_world_are_rejected():
+    with pytest.raises(ValueError):
+        RouteCorridor([(47.6, -122.3), (95.0, -122.3)], buffer_m=100)
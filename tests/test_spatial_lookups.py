@@ -0,0 +1,76 @@
+import math
+
+from offline_geocoder import OfflineGeocoder
+from road_index import RoadSegmentIndex
+from spatial_index import METERS_PER_DEGREE, GridIndex, bbox_around
+
+LAT = 47.6
+# Just east of a 0.002 degree cell boundary; cells are ~150 m wide here
+LNG = -122.29999
+
+
+def test_reverse_finds_nearest_point_two_cells_away():
+    rows = [
+        # ~188 m west, two cells over
+        {'lat': LAT, 'lng': -122.3025, 'address': '1 West Street', 'street': 'West Street'},
+        # ~195 m north, in the neighbouring cell
+        {'lat': LAT + 0.00175, 'lng': LNG, 'address': '2 North Street', 'street': 'North Street'}
+    ]
+    geocoder = OfflineGeocoder.build(rows, cell_size_deg=0.002)
+
+    hit = geocoder.reverse(LAT, LNG, max_distance_m=200)
+
+    assert hit['address'] == '1 West Street'
+    assert hit['distance_m'] < 195
+
+
+def test_reverse_ignores_points_beyond_max_distance():
+    rows = [{'lat': LAT, 'lng': -122.3035, 'address': '1 Far Street'}]
+    geocoder = OfflineGeocoder.build(rows, cell_size_deg=0.002)
+
+    assert geocoder.reverse(LAT, LNG, max_distance_m=200) is None
+
+
+def test_nearest_finds_segment_two_cells_away():
+    # 0.0005 degree cells are ~37 m wide at this latitude; the road is ~45 m east
+    lng = -122.30001
+    road_lng = lng + 45 / (METERS_PER_DEGREE * math.cos(math.radians(LAT)))
+    features = [{
+        'type': 'Feature',
+        'properties': {'highway': 'primary', 'name': 'East Road'},
+        'geometry': {'type': 'LineString', 'coordinates': [[road_lng, LAT - 0.0001], [road_lng, LAT + 0.0001]]}
+    }]
+    index = RoadSegmentIndex.build(features, cell_size_deg=0.0005)
+
+    segment = index.nearest(LAT, lng, max_distance_m=50)
+
+    assert segment is not None
+    assert segment['name'] == 'East Road'
+
+
+def test_bbox_around_the_pole_is_clipped_to_the_world():
+    south, west, north, east = bbox_around(90.0, 10.0, 50000)
+
+    assert (west, north, east) == (-180.0, 90.0, 180.0)
+    assert south < 90.0
+
+
+def test_grid_radius_query_at_the_pole_scans_only_occupied_cells():
+    index = GridIndex(0.01)
+    index.insert('pole', 89.9, 45.0)
+    index.insert('far', 47.6, -122.3)
+
+    # The clipped box still spans millions of cells; the query must not list them
+    assert index.cell_count(*bbox_around(90.0, 0.0, 50000)) > 1000000
+    assert [item_id for item_id, _ in index.query_radius(90.0, 0.0, 50000)] == ['pole']
+
+
+def test_polar_lookups_scan_only_occupied_cells():
+    rows = [{'lat': 89.999, 'lng': 100.0, 'address': '1 Pole Street'},
+            {'lat': 89.0, 'lng': 100.0, 'address': '2 Far Street'}]
+    geocoder = OfflineGeocoder.build(rows, cell_size_deg=0.002)
+
+    hit = geocoder.reverse(90.0, 0.0, max_distance_m=200)
+
+    assert hit['address'] == '1 Pole Street'
+    assert geocoder.reverse(90.0, 0.0, max_distance_m=50) is None